@@ -2,5 +2,9 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Под ASGI синхронный код каждого запроса идёт в своём потоке, а соединения с БД
+# привязаны к потоку — постоянные соединения не переиспользуются. Закрываем их
+# в конце запроса; дешёвые подключения даёт DB_POOL=pgbouncer
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
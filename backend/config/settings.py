@@ -6,6 +6,7 @@ from dotenv import load_dotenv
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 
 load_dotenv(BASE_DIR / ".env")
 
@@ -30,6 +31,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Первым — чтобы время ответа включало все остальные middleware
+    "shop.middleware.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -63,6 +66,7 @@ CORS_ALLOW_HEADERS = [
     "user-agent",
     "x-csrftoken",
     "x-requested-with",
+    "idempotency-key",
 ]
 
 # Allow all methods including POST, OPTIONS
@@ -104,19 +108,83 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "config.wsgi.application"
 
+IS_POSTGRES = (os.getenv("DATABASE_URL") or "").startswith("postgres")
+
 DATABASES = {
     "default": dj_database_url.config(
         default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}",
-        conn_max_age=600,
-        ssl_require=True,
+        conn_max_age=int(os.getenv("DB_CONN_MAX_AGE", "600")),
+        # Перед повторным использованием соединение проверяется: если Postgres
+        # его закрыл, запрос получит новое, а не ошибку
+        conn_health_checks=True,
+        # sslmode есть только у PostgreSQL; с sqlite:// (локально, бенчмарки) он ломает подключение
+        ssl_require=IS_POSTGRES,
     )
 }
 
-# Enhanced debug logging for database verification
-import os
-print("DATABASE_URL exists:", bool(os.getenv("DATABASE_URL")))
-print("DATABASE_URL host:", (os.getenv("DATABASE_URL") or "")[:80])
-print("DB ENGINE:", DATABASES["default"]["ENGINE"])
+# Пул соединений с БД (DB_POOL):
+#   ""          — у каждого воркера своё постоянное соединение (CONN_MAX_AGE)
+#   "pgbouncer" — DATABASE_URL указывает на PgBouncer в режиме transaction;
+#                 серверные курсоры при этом не работают
+# Пула внутри процесса (psycopg3) нет: он требует Django 5.1+, а здесь 5.0
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "3"))
+DB_POOL = os.getenv("DB_POOL", "").lower()
+if DB_POOL not in ("", "pgbouncer"):
+    raise ImproperlyConfigured(f"Unknown DB_POOL={DB_POOL!r}; use pgbouncer or leave it empty.")
+
+if IS_POSTGRES and DB_POOL == "pgbouncer":
+    DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = True
+
+# Какая БД подключена — `python manage.py db_info` или
+# `python manage.py check --database default`
+
+# REDIS_URL делает кэш общим для всех воркеров (нужен пакет redis);
+# без него у каждого процесса свой LocMemCache
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Кэш каталога /api/products/ (секунды) и размер LRU в памяти процесса
+CATALOG_CACHE_TTL = int(os.getenv("CATALOG_CACHE_TTL", "300"))
+CATALOG_LRU_SIZE = int(os.getenv("CATALOG_LRU_SIZE", "16"))
+# Сколько секунд /api/cart/quote держит товары в памяти процесса. Версия
+# каталога общая для воркеров только с Redis; без него правка через другой
+# воркер видна в расчёте корзины не позже, чем через это время
+CART_QUOTE_SNAPSHOT_TTL = int(os.getenv("CART_QUOTE_SNAPSHOT_TTL", "30"))
+# "orjson" — быстрый рендер JSON каталога (pip install orjson), иначе stdlib json
+PRODUCT_JSON_ENCODER = os.getenv("PRODUCT_JSON_ENCODER", "json")
+
+# Метрики запросов: /api/metrics (закрыт токеном, если METRICS_TOKEN задан)
+# и заголовок Server-Timing с временем в БД
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() == "true"
+
+# Сколько часов хранится ответ на заказ с Idempotency-Key
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24"))
+
+# Сколько дней хранятся записи об удалённых товарах для /api/products/?since=;
+# клиент с более старым курсором получает полный каталог
+CATALOG_FEED_RETENTION_DAYS = int(os.getenv("CATALOG_FEED_RETENTION_DAYS", "30"))
+
+# Превью фото /api/images/<hash>/<w>x<h>.webp (нужен пакет Pillow).
+# Кэш на диске общий для воркеров; PUBLIC_BASE_URL — адрес бэкенда,
+# по которому Telegram скачивает превью вместо оригиналов
+IMAGE_THUMBNAILS = os.getenv("IMAGE_THUMBNAILS", "true").lower() == "true"
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", str(BASE_DIR / "image_cache"))
+IMAGE_CACHE_MAX_MB = int(os.getenv("IMAGE_CACHE_MAX_MB", "512"))
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+THUMBNAIL_SIZES = ("320x320", "640x640", "1280x1280")
+PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", "").rstrip("/")
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -157,8 +225,3 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.AllowAny",
     ]
 }
-
-# Definitive database verification - remove after confirming PostgreSQL connection
-from django.db import connection
-print("DB vendor:", connection.vendor)
-print("DB name:", connection.settings_dict.get("NAME"))
@@ -1,6 +1,56 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.functional import cached_property
 
-from .models import Order, OrderItem, Product
+from .models import Order, OrderItem, Product, ProductSize, TelegramOutbox
+from .services import stock
+from .sizes import normalize_sizes
+
+# Ниже этого числа строк оценка неточна, а обычный COUNT(*) и так быстрый
+ESTIMATED_COUNT_THRESHOLD = 10_000
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    На PostgreSQL для списка без фильтров берёт оценку числа строк из pg_class
+    вместо COUNT(*) по всей таблице. С фильтрами и поиском считает как обычно:
+    такие COUNT идут по индексам.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == "postgresql" and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] >= ESTIMATED_COUNT_THRESHOLD:
+                return row[0]
+        return super().count
+
+
+class ProductSizeInline(admin.TabularInline):
+    """Остатки по размерам. Сами размеры задаются полем sizes товара."""
+
+    model = ProductSize
+    extra = 0
+    fields = ("size", "stock_qty")
+    readonly_fields = ("size",)
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description="Size")
+    def size(self, obj):
+        return f"{obj.tenths / 10:g}"
 
 
 @admin.register(Product)
@@ -8,26 +58,63 @@ class ProductAdmin(admin.ModelAdmin):
     list_display = ("title", "price_uzs", "in_stock", "created_at")
     search_fields = ("title", "slug")
     list_filter = ("in_stock",)
+    inlines = [ProductSizeInline]
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # Размер, убранный из sizes в этой же форме, Product.save() уже удалил,
+        # а строка остатка из inline вставила его заново — синхронизируем ещё раз
+        tenths = set(normalize_sizes(form.instance.sizes))
+        form.instance.sync_size_options(sorted(tenths))
+        # Размер пополнили с нуля — товар, снятый при распродаже, снова в продаже.
+        # Если in_stock меняли в этой же форме, решение администратора важнее.
+        if "in_stock" in form.changed_data:
+            return
+        restocked = any(
+            size_form.initial.get("stock_qty") == 0 and (size_form.instance.stock_qty or 0) > 0
+            for formset in formsets
+            if formset.model is ProductSize
+            for size_form in formset.forms
+            if size_form.instance.tenths in tenths
+        )
+        if restocked:
+            stock.mark_restocked([form.instance.pk])
 
 
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
-    readonly_fields = (
+    # description_snapshot не показываем в строках заказа — он есть на странице позиции
+    fields = (
         "product",
         "title_snapshot",
-        "description_snapshot",
         "price_snapshot_uzs",
         "image_url_snapshot",
         "qty",
         "selected_size",
     )
+    readonly_fields = fields
     can_delete = False
 
+    def get_queryset(self, request):
+        return (
+            super()
+            .get_queryset(request)
+            .select_related("product")
+            .defer("description_snapshot", "product__description", "product__image_urls")
+        )
+
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
-    list_display = ("id", "customer_name", "status", "created_at")
+    list_display = ("id", "customer_name", "customer_phone", "status", "subtotal_uzs", "items_count", "created_at")
+    # Оба фильтра и сортировка по дате опираются на индексы shop_order_*_idx
+    list_filter = ("status", "created_at")
+    date_hierarchy = "created_at"
+    list_per_page = 50
+    paginator = EstimatedCountPaginator
+    # Без второго COUNT(*) по всей таблице при включённых фильтрах
+    show_full_result_count = False
     readonly_fields = (
         "id",
         "customer_name",
@@ -42,10 +129,32 @@ class OrderAdmin(admin.ModelAdmin):
     )
     inlines = [OrderItemInline]
 
+    def get_queryset(self, request):
+        # Подзапрос, а не annotate(Count("items")): без GROUP BY по заказам,
+        # и COUNT(*) пагинатора его отбрасывает
+        items_count = (
+            OrderItem.objects.filter(order=OuterRef("pk"))
+            .order_by()
+            .values("order")
+            .annotate(count=Count("*"))
+            .values("count")
+        )
+        return super().get_queryset(request).annotate(
+            items_count=Coalesce(Subquery(items_count, output_field=IntegerField()), 0)
+        )
+
+    @admin.display(description="Items", ordering="items_count")
+    def items_count(self, obj):
+        return obj.items_count
+
 
 @admin.register(OrderItem)
 class OrderItemAdmin(admin.ModelAdmin):
     list_display = ("order", "title_snapshot", "qty", "selected_size")
+    list_select_related = ("order",)
+    list_per_page = 50
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     readonly_fields = (
         "order",
         "product",
@@ -56,3 +165,23 @@ class OrderItemAdmin(admin.ModelAdmin):
         "qty",
         "selected_size",
     )
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if request.resolver_match and request.resolver_match.url_name.endswith("_changelist"):
+            queryset = queryset.defer("description_snapshot")
+        return queryset
+
+
+@admin.register(TelegramOutbox)
+class TelegramOutboxAdmin(admin.ModelAdmin):
+    list_display = ("order", "status", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status",)
+    list_select_related = ("order",)
+    readonly_fields = (
+        "order",
+        "attempts",
+        "last_error",
+        "created_at",
+        "sent_at",
+    )
@@ -0,0 +1,54 @@
+"""
+Проверки подключения к БД. Тег database — Django запускает их только
+в `python manage.py check --database default` и перед migrate;
+check_asgi_connections — в `python manage.py check --deploy`.
+"""
+
+import os
+
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+from django.db import DatabaseError, connections
+
+
+@register(Tags.database)
+def check_database_connection(app_configs, databases=None, **kwargs):
+    if not databases:
+        return []
+    messages = []
+    for alias in databases:
+        connection = connections[alias]
+        if connection.vendor == "sqlite" and not os.getenv("DATABASE_URL") and not settings.DEBUG:
+            messages.append(
+                Warning(
+                    "DATABASE_URL is not set, falling back to SQLite.",
+                    hint="Set DATABASE_URL to the PostgreSQL connection string.",
+                    id="shop.W001",
+                )
+            )
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except DatabaseError as e:
+            messages.append(Error(f"Cannot connect to database {alias!r}: {e}", id="shop.E001"))
+    return messages
+
+
+@register(deploy=True)
+def check_asgi_connections(app_configs, **kwargs):
+    """
+    config/asgi.py ставит DB_CONN_MAX_AGE=0: без пула каждый запрос открывает
+    новое (TLS) соединение с PostgreSQL.
+    """
+    db = settings.DATABASES["default"]
+    if not settings.IS_POSTGRES or settings.DB_POOL or db.get("CONN_MAX_AGE") != 0:
+        return []
+    return [
+        Warning(
+            "PostgreSQL without a connection pool and with CONN_MAX_AGE=0: "
+            "every request opens a new database connection.",
+            hint="Under ASGI put PgBouncer in front of the database and set "
+            "DB_POOL=pgbouncer; otherwise serve config.wsgi.",
+            id="shop.W002",
+        )
+    ]
@@ -0,0 +1,76 @@
+"""
+Быстрый путь чтения товаров: строки из .values() вместо ModelSerializer.
+JSON совпадает с ProductListSerializer байт в байт (FastSerializerParityTests в shop/tests.py).
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Iterable
+
+from django.conf import settings
+from django.utils import timezone
+
+from .serializers import ProductListSerializer
+from .services import thumbnails
+
+PRODUCT_FIELDS: tuple[str, ...] = ProductListSerializer.Meta.fields
+# Вычисляемые поля ответа и колонки, из которых они считаются
+COMPUTED_FIELDS: dict[str, str] = {"thumbnail_url": "image_urls"}
+
+
+def _format_datetime(value) -> str | None:
+    # Как rest_framework.fields.DateTimeField: текущая таймзона, ISO 8601, "Z" для UTC
+    if value is None:
+        return None
+    if settings.USE_TZ and timezone.is_aware(value):
+        value = value.astimezone(timezone.get_current_timezone())
+    text = value.isoformat()
+    if text.endswith("+00:00"):
+        text = text[:-6] + "Z"
+    return text
+
+
+def product_values(queryset, fields: Iterable[str] | None = None):
+    """values()-запрос с полями, нужными для ответа (плюс ключи курсора)."""
+    fields = tuple(fields or PRODUCT_FIELDS)
+    columns = (COMPUTED_FIELDS.get(name, name) for name in fields)
+    return queryset.values(*dict.fromkeys((*columns, "id", "created_at")))
+
+
+def serialize_product_rows(
+    rows: Iterable[dict[str, Any]], fields: Iterable[str] | None = None
+) -> list[dict[str, Any]]:
+    fields = tuple(fields or PRODUCT_FIELDS)
+    out = []
+    for row in rows:
+        item = {
+            name: thumbnails.thumbnail_url(row["image_urls"]) if name == "thumbnail_url" else row[name]
+            for name in fields
+        }
+        if "id" in item:
+            item["id"] = str(item["id"])
+        if "created_at" in item:
+            item["created_at"] = _format_datetime(item["created_at"])
+        out.append(item)
+    return out
+
+
+def render_json(data: Any) -> bytes:
+    """
+    Рендерит ответ в байты. PRODUCT_JSON_ENCODER="orjson" включает orjson
+    (если установлен); по умолчанию — stdlib json с теми же параметрами,
+    что у DRF JSONRenderer, поэтому байты совпадают.
+    """
+    if getattr(settings, "PRODUCT_JSON_ENCODER", "json") == "orjson":
+        try:
+            import orjson
+        except ImportError:
+            pass
+        else:
+            return orjson.dumps(data)
+
+    text = json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+    # Как в DRF: U+2028/U+2029 ломают JSONP и inline-скрипты
+    text = text.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029")
+    return text.encode()
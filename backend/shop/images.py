@@ -0,0 +1,49 @@
+"""
+Ссылки на фото товаров (Product.image_urls). Первая ссылка копируется
+в OrderItem.image_url_snapshot, поэтому правила — как у этого URLField.
+"""
+
+import hashlib
+from typing import Any
+
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+
+# Превью отдаёт /api/images/<hash>/<w>x<h>.<fmt> (shop/services/thumbnails.py)
+CATALOG_THUMBNAIL_SIZE = "640x640"
+TELEGRAM_THUMBNAIL_SIZE = "1280x1280"
+THUMBNAIL_FORMATS = {"webp": "image/webp", "jpg": "image/jpeg"}
+
+IMAGE_URL_MAX_LENGTH = 200  # OrderItem.image_url_snapshot — URLField с длиной по умолчанию
+
+_url_validator = URLValidator(schemes=["http", "https"])
+
+
+def normalize_image_urls(image_urls: Any) -> list[str]:
+    """Непустой список http(s)-ссылок без повторов, порядок сохраняется."""
+    if not isinstance(image_urls, list) or not image_urls:
+        raise ValidationError("Нужен список ссылок на фото (хотя бы одна).")
+    out: list[str] = []
+    for value in image_urls:
+        url = str(value).strip() if isinstance(value, str) else None
+        try:
+            if not url or len(url) > IMAGE_URL_MAX_LENGTH:
+                raise ValidationError("bad url")
+            _url_validator(url)
+        except ValidationError:
+            raise ValidationError(f"Неверная ссылка на фото: {value!r}.")
+        if url not in out:
+            out.append(url)
+    return out
+
+
+def validate_image_urls(image_urls: Any) -> None:
+    normalize_image_urls(image_urls)
+
+
+def image_hash(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+
+
+def thumbnail_path(url: str, size: str = CATALOG_THUMBNAIL_SIZE, fmt: str = "webp") -> str:
+    return f"/api/images/{image_hash(url)}/{size}.{fmt}"
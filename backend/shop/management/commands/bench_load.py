@@ -0,0 +1,336 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from shop.models import Order, OrderItem, Product, ProductTombstone, TelegramOutbox
+from shop.services import catalog_cache
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(int(round(pct / 100 * len(ordered))) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    return {
+        "count": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+class _Rollback(Exception):
+    pass
+
+
+class TelegramStub:
+    """Локальная заглушка Bot API: отвечает ok после искусственной задержки."""
+
+    def __init__(self, latency: float) -> None:
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                stub.requests += 1
+                time.sleep(latency)
+                body = b'{"ok":true,"result":{}}'
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test POST /api/orders/ and GET /api/products/ against a local gunicorn "
+        "with a latency-injecting Telegram stub. Seeds bench-* products in the configured "
+        "database and removes them afterwards. Refuses to run unless DEBUG=true or "
+        "--scratch-db confirms that DATABASE_URL points at a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=200)
+        parser.add_argument("--orders", type=int, default=200)
+        parser.add_argument("--catalog-gets", type=int, default=500)
+        parser.add_argument("--items-per-order", type=int, default=3)
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument("--telegram-latency", type=float, default=500, help="Stub latency, ms.")
+        parser.add_argument("--workers", type=int, default=3, help="gunicorn workers.")
+        parser.add_argument(
+            "--server",
+            default="gunicorn config.wsgi:application",
+            help="Server command; --bind and --workers are appended.",
+        )
+        parser.add_argument(
+            "--asgi",
+            action="store_true",
+            help="Shortcut for --server 'gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker'.",
+        )
+        parser.add_argument("--url", help="Use an already running server instead of starting one.")
+        parser.add_argument(
+            "--env",
+            action="append",
+            default=[],
+            metavar="KEY=VALUE",
+            help="Extra environment for the server, e.g. --env DB_CONN_MAX_AGE=0 --env DB_POOL=pgbouncer.",
+        )
+        parser.add_argument("--with-worker", action="store_true", help="Also run telegram_worker.")
+        parser.add_argument("--output", default="bench_results.json")
+        parser.add_argument(
+            "--scratch-db",
+            action="store_true",
+            help="Confirm that the configured database is a scratch one (required unless DEBUG=true).",
+        )
+
+    def handle(self, *args, **options):
+        # Заказы бенчмарка коммитятся в настроенную БД: боевой telegram_worker
+        # отправил бы их в чат сотрудников раньше, чем _cleanup их удалит
+        if not (settings.DEBUG or options["scratch_db"]):
+            raise CommandError(
+                f"bench_load writes products and orders to {connection.vendor} database "
+                f"{connection.settings_dict['NAME']!r}. Point DATABASE_URL at a scratch database "
+                "and pass --scratch-db."
+            )
+        if options["asgi"]:
+            options["server"] = "gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker"
+        run = uuid.uuid4().hex[:8]
+        slugs = self._seed(run, options["products"])
+        try:
+            with TelegramStub(options["telegram_latency"] / 1000) as stub:
+                env = {
+                    **os.environ,
+                    "TELEGRAM_API_URL": stub.url,
+                    "TELEGRAM_BOT_TOKEN": "bench",
+                    "TELEGRAM_CHAT_ID": "1",
+                    "TELEGRAM_CHAT_RATE": "1000",
+                    "TELEGRAM_CHAT_BURST": "1000",
+                    "ALLOWED_HOSTS": "127.0.0.1,localhost",
+                    **dict(item.split("=", 1) for item in options["env"]),
+                }
+                report = self._run(options, env, slugs, stub)
+            report["queries"] = self._count_queries(slugs, options["items_per_order"])
+        finally:
+            self._cleanup(run)
+        report["meta"] = {
+            "run": run,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "database": connection.vendor,
+            **{k: options[k] for k in (
+                "products", "orders", "catalog_gets", "items_per_order", "concurrency",
+                "telegram_latency", "workers", "server", "with_worker", "env",
+            )},
+        }
+
+        Path(options["output"]).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+        for name, stats in report["endpoints"].items():
+            if "count" not in stats:
+                self.stdout.write(f"{name:<14} {stats}")
+                continue
+            self.stdout.write(
+                f"{name:<14} n={stats['count']:<5} err={stats['errors']:<3} "
+                f"rps={stats['throughput_rps']:<8} p50={stats['p50_ms']}ms "
+                f"p95={stats['p95_ms']}ms p99={stats['p99_ms']}ms"
+            )
+        for name, count in report["queries"].items():
+            self.stdout.write(f"queries {name}: {count}")
+        self.stdout.write(self.style.SUCCESS(f"Saved {options['output']}"))
+
+    def _seed(self, run: str, count: int) -> list[str]:
+        products = [
+            Product(
+                title=f"Bench ring {i}",
+                slug=f"bench-{run}-{i}",
+                description="Серебро 925 пробы. " * 5,
+                price_uzs=100_000 + i,
+                sizes=[16, 16.5, 17],
+                image_urls=[f"https://example.com/bench/{i}.jpg"],
+            )
+            for i in range(count)
+        ]
+        # save(), а не bulk_create: нужны ProductSize и инвалидация кэша каталога
+        for product in products:
+            product.save()
+        return [p.slug for p in products]
+
+    def _cleanup(self, run: str) -> None:
+        prefix = f"bench-{run}-"
+        order_ids = OrderItem.objects.filter(product__slug__startswith=prefix).values("order_id")
+        # Вместе с заказами удаляются и их записи outbox (CASCADE)
+        Order.objects.filter(pk__in=order_ids).delete()
+        product_ids = []
+        for product in Product.objects.filter(slug__startswith=prefix):
+            product_ids.append(product.pk)
+            product.delete()
+        # delete() оставляет записи для ленты изменений — товаров бенчмарка клиенты не видели
+        ProductTombstone.objects.filter(product_id__in=product_ids).delete()
+
+    def _order_payload(self, slugs: list[str], n: int, items: int) -> dict:
+        return {
+            "customer": {"name": "Bench", "phone": "+998000000000", "address": "Tashkent"},
+            "items": [
+                {"productSlug": slugs[(n + i) % len(slugs)], "qty": 1, "selectedSize": 16.5}
+                for i in range(items)
+            ],
+            "meta": {"locale": "ru", "theme": "light"},
+        }
+
+    def _run(self, options, env, slugs, stub) -> dict:
+        processes = []
+        base_url = options["url"]
+        if not base_url:
+            port = 8700 + os.getpid() % 200
+            base_url = f"http://127.0.0.1:{port}"
+            cmd = options["server"].split() + ["--bind", f"127.0.0.1:{port}", "--workers", str(options["workers"])]
+            processes.append(subprocess.Popen(cmd, cwd=settings.BASE_DIR, env=env))
+        if options["with_worker"]:
+            processes.append(
+                subprocess.Popen([sys.executable, "manage.py", "telegram_worker"], cwd=settings.BASE_DIR, env=env)
+            )
+
+        try:
+            self._wait_ready(base_url)
+            endpoints = {}
+            endpoints["catalog_get"] = self._load(
+                options["concurrency"],
+                options["catalog_gets"],
+                lambda session, n: session.get(f"{base_url}/api/products/", timeout=60),
+            )
+            endpoints["order_post"] = self._load(
+                options["concurrency"],
+                options["orders"],
+                lambda session, n: session.post(
+                    f"{base_url}/api/orders/",
+                    json=self._order_payload(slugs, n, options["items_per_order"]),
+                    timeout=60,
+                ),
+            )
+            if options["with_worker"]:
+                endpoints["telegram_drain"] = self._wait_drained(options["orders"])
+            return {"endpoints": endpoints, "telegram_stub_requests": stub.requests}
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.wait(timeout=30)
+
+    @staticmethod
+    def _wait_ready(base_url: str) -> None:
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                if requests.get(f"{base_url}/health", timeout=1).ok:
+                    return
+            except requests.RequestException:
+                pass
+            time.sleep(0.2)
+        raise CommandError(f"Server at {base_url} did not become ready")
+
+    @staticmethod
+    def _load(concurrency: int, total: int, call) -> dict:
+        local = threading.local()
+        latencies: list[float] = []
+        errors = 0
+        lock = threading.Lock()
+
+        def one(n: int) -> None:
+            nonlocal errors
+            session = getattr(local, "session", None)
+            if session is None:
+                session = local.session = requests.Session()
+            start = time.perf_counter()
+            try:
+                ok = call(session, n).status_code < 400
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(one, range(total)))
+        return summarize(latencies, errors, time.perf_counter() - start)
+
+    @staticmethod
+    def _wait_drained(expected: int) -> dict:
+        start = time.perf_counter()
+        deadline = time.monotonic() + 600
+        pending = expected
+        while time.monotonic() < deadline:
+            pending = TelegramOutbox.objects.filter(status=TelegramOutbox.STATUS_PENDING).count()
+            if not pending:
+                break
+            time.sleep(0.5)
+        return {"seconds": round(time.perf_counter() - start, 2), "pending": pending}
+
+    def _count_queries(self, slugs: list[str], items: int) -> dict:
+        """Количество SQL-запросов на один запрос к каждому эндпоинту (в этом процессе)."""
+        client = Client()
+        counts = {}
+        with override_settings(ALLOWED_HOSTS=["*"]):
+            catalog_cache.invalidate()
+            with CaptureQueriesContext(connection) as ctx:
+                client.get("/api/products/")
+            counts["catalog_get_cold"] = len(ctx)
+            with CaptureQueriesContext(connection) as ctx:
+                client.get("/api/products/")
+            counts["catalog_get_warm"] = len(ctx)
+            with CaptureQueriesContext(connection) as ctx:
+                client.get(f"/api/products/{slugs[0]}/")
+            counts["product_detail"] = len(ctx)
+            # Заказ откатывается: запись outbox не коммитится, и ни один воркер её не увидит
+            try:
+                with transaction.atomic(), CaptureQueriesContext(connection) as ctx:
+                    client.post(
+                        "/api/orders/",
+                        json.dumps(self._order_payload(slugs, 0, items)),
+                        content_type="application/json",
+                    )
+                    raise _Rollback
+            except _Rollback:
+                pass
+            counts["order_post"] = len(ctx)
+        return counts
@@ -0,0 +1,81 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from shop.fast_serializers import product_values, render_json, serialize_product_rows
+from shop.models import Product
+from shop.serializers import ProductListSerializer
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time ProductListSerializer against the .values() fast path on N seeded products. "
+        "Seed data is rolled back; output parity is checked in shop/tests.py."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+        parser.add_argument("--repeat", type=int, default=5, help="Best of N runs.")
+
+    def handle(self, *args, **options):
+        for size in options["sizes"]:
+            try:
+                with transaction.atomic():
+                    self._bench(size, options["repeat"])
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+    def _seed(self, size: int) -> None:
+        run = uuid.uuid4().hex[:8]
+        Product.objects.bulk_create(
+            [
+                Product(
+                    title=f"Кольцо {i}",
+                    slug=f"bench-{run}-{i}",
+                    description="Серебро 925 пробы. " * 10,
+                    price_uzs=100_000 + i,
+                    sizes=[15, 15.5, 16, 16.5, 17],
+                    image_urls=[f"https://example.com/{run}/{i}.jpg"],
+                )
+                for i in range(size)
+            ],
+            batch_size=1000,
+        )
+
+    def _bench(self, size: int, repeat: int) -> None:
+        self._seed(size)
+        queryset = Product.objects.all()
+
+        def drf() -> bytes:
+            return JSONRenderer().render(ProductListSerializer(queryset.all(), many=True).data)
+
+        def fast() -> bytes:
+            return render_json(serialize_product_rows(product_values(queryset.all())))
+
+        drf_body, drf_time = self._time(drf, repeat)
+        fast_body, fast_time = self._time(fast, repeat)
+
+        total = queryset.count()
+        self.stdout.write(
+            f"{total:>6} products  drf {drf_time * 1000:9.1f} ms  "
+            f"fast {fast_time * 1000:9.1f} ms  x{drf_time / fast_time:.1f}  "
+            f"bytes identical: {drf_body == fast_body}"
+        )
+
+    @staticmethod
+    def _time(func, repeat: int) -> tuple[bytes, float]:
+        best = float("inf")
+        body = b""
+        for _ in range(repeat):
+            start = time.perf_counter()
+            body = func()
+            best = min(best, time.perf_counter() - start)
+        return body, best
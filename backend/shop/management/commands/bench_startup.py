@@ -0,0 +1,103 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Выполняется в чистом интерпретаторе: так меряется то же, что платит
+# каждый воркер gunicorn и каждый вызов manage.py
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+baseline_modules = len(sys.modules)
+
+from django.conf import settings
+settings.INSTALLED_APPS
+settings_done = time.perf_counter()
+
+import django
+django.setup()
+setup_done = time.perf_counter()
+
+from django.core.handlers.wsgi import WSGIHandler
+WSGIHandler()
+handler_done = time.perf_counter()
+
+from django.urls import get_resolver
+get_resolver().url_patterns
+urls_done = time.perf_counter()
+
+from django.db import connections
+print(json.dumps({
+    "settings_ms": (settings_done - start) * 1000,
+    "setup_ms": (setup_done - settings_done) * 1000,
+    "middleware_ms": (handler_done - setup_done) * 1000,
+    "urlconf_ms": (urls_done - handler_done) * 1000,
+    "total_ms": (urls_done - start) * 1000,
+    "modules_after_setup": len(sys.modules) - baseline_modules,
+    "db_connected": any(c.connection is not None for c in connections.all(initialized_only=True)),
+}))
+"""
+
+PHASES = ("settings_ms", "setup_ms", "middleware_ms", "urlconf_ms", "total_ms")
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure cold startup: settings import, django.setup(), middleware and URLconf "
+        "loading, plus the number of imported modules. Each sample is a fresh interpreter."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--max-total-ms", type=float, help="Fail if median total exceeds this.")
+        parser.add_argument("--max-modules", type=int, help="Fail if more modules are imported.")
+        parser.add_argument("--output", help="Write the report to a JSON file.")
+
+    def handle(self, *args, **options):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ["DJANGO_SETTINGS_MODULE"]}
+        samples = []
+        for _ in range(options["repeat"]):
+            result = subprocess.run(
+                [sys.executable, "-c", PROBE],
+                cwd=settings.BASE_DIR,
+                env=env,
+                capture_output=True,
+                text=True,
+            )
+            if result.returncode != 0:
+                raise CommandError(f"Startup probe failed:\n{result.stderr}")
+            # Последняя строка — JSON; всё, что выше, напечатано при импорте
+            lines = result.stdout.strip().splitlines()
+            samples.append(json.loads(lines[-1]))
+            stray_output = lines[:-1]
+
+        report = {
+            phase: round(statistics.median(s[phase] for s in samples), 1) for phase in PHASES
+        }
+        report["modules_after_setup"] = max(s["modules_after_setup"] for s in samples)
+        report["db_connected"] = any(s["db_connected"] for s in samples)
+        report["stray_output_lines"] = len(stray_output)
+        report["repeat"] = options["repeat"]
+
+        for key, value in report.items():
+            self.stdout.write(f"{key:<22} {value}")
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(report, indent=2))
+
+        problems = []
+        if report["db_connected"]:
+            problems.append("startup opened a database connection")
+        if stray_output:
+            problems.append(f"startup printed {len(stray_output)} line(s): {stray_output[0]!r}")
+        if options["max_total_ms"] and report["total_ms"] > options["max_total_ms"]:
+            problems.append(f"median total {report['total_ms']} ms > {options['max_total_ms']} ms")
+        if options["max_modules"] and report["modules_after_setup"] > options["max_modules"]:
+            problems.append(f"{report['modules_after_setup']} modules > {options['max_modules']}")
+        if problems:
+            raise CommandError("; ".join(problems))
+        self.stdout.write(self.style.SUCCESS("Startup OK"))
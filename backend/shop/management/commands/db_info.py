@@ -0,0 +1,35 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connections
+
+
+class Command(BaseCommand):
+    help = "Show which database is configured and check that it answers (replaces the old settings prints)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        settings_dict = connection.settings_dict
+        self.stdout.write(f"DATABASE_URL set: {bool(os.getenv('DATABASE_URL'))}")
+        self.stdout.write(f"Engine: {settings_dict['ENGINE']}")
+        self.stdout.write(f"Vendor: {connection.vendor}")
+        self.stdout.write(f"Name: {settings_dict.get('NAME')}")
+        self.stdout.write(f"Host: {settings_dict.get('HOST') or '-'}:{settings_dict.get('PORT') or '-'}")
+        self.stdout.write(f"CONN_MAX_AGE: {settings_dict.get('CONN_MAX_AGE')}")
+        self.stdout.write(f"CONN_HEALTH_CHECKS: {settings_dict.get('CONN_HEALTH_CHECKS')}")
+        self.stdout.write(f"DB_POOL: {settings.DB_POOL or '-'}")
+        self.stdout.write(f"Workers: {settings.WEB_CONCURRENCY}")
+
+        start = time.perf_counter()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except DatabaseError as e:
+            raise CommandError(f"Connection failed: {e}") from e
+        elapsed = (time.perf_counter() - start) * 1000
+        self.stdout.write(self.style.SUCCESS(f"Connected in {elapsed:.1f} ms"))
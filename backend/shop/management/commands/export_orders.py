@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from shop.services import order_export
+
+
+class Command(BaseCommand):
+    help = (
+        "Export orders as CSV (one row per item) or NDJSON (one line per order). "
+        "Reads in chunks, so memory does not grow with the period."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=sorted(order_export.FORMATS), default="csv")
+        parser.add_argument("--from", dest="date_from", help="First day, YYYY-MM-DD (shop time zone).")
+        parser.add_argument("--to", dest="date_to", help="Last day, YYYY-MM-DD, inclusive.")
+        parser.add_argument("--status", help="Only orders with this status.")
+        parser.add_argument("--output", "-o", help="File path; stdout by default.")
+
+    def handle(self, *args, **options):
+        try:
+            queryset = order_export.export_queryset(options["date_from"], options["date_to"], options["status"])
+        except ValueError as e:
+            raise CommandError(str(e)) from e
+
+        chunks = order_export.iter_export(queryset, options["format"])
+        if not options["output"]:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+
+        with open(options["output"], "w", encoding="utf-8", newline="") as f:
+            for chunk in chunks:
+                f.write(chunk)
+        self.stderr.write(self.style.SUCCESS(f"Saved {options['output']}"))
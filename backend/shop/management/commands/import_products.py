@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from shop.services import product_import
+
+
+class Command(BaseCommand):
+    help = (
+        "Create or update products from CSV/JSON, matched by slug. Columns: slug, title, "
+        "description, price_uzs, currency, sizes, in_stock, image_urls. In CSV, sizes and "
+        "image_urls are separated by ';', '|' or spaces, or given as a JSON list."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["csv", "json"], help="Defaults to the file extension.")
+        parser.add_argument("--batch-size", type=int, default=product_import.BATCH_SIZE)
+        parser.add_argument("--dry-run", action="store_true", help="Only validate the file.")
+        parser.add_argument(
+            "--skip-invalid",
+            action="store_true",
+            help="Import valid rows even if some rows have errors.",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            rows = product_import.read_rows(options["path"], options["format"])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e)) from e
+
+        result = product_import.validate_rows(rows)
+        for error in result.errors:
+            self.stderr.write(error)
+        self.stdout.write(f"Rows: {len(rows)}, valid: {len(result.products)}, errors: {len(result.errors)}")
+
+        if result.errors and not options["skip_invalid"]:
+            raise CommandError("Nothing imported; fix the rows above or pass --skip-invalid.")
+        if options["dry_run"]:
+            return
+
+        product_import.import_products(result, batch_size=options["batch_size"])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            self.style.SUCCESS(f"Created: {result.created}, updated: {result.updated} in {elapsed:.2f}s")
+        )
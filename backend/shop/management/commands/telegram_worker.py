@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections, connections
+
+from shop.services import telegram_client
+from shop.services.catalog_feed import purge_tombstones
+from shop.services.idempotency import purge_expired
+from shop.services.telegram_outbox import MAX_ATTEMPTS, adrain, drain
+
+
+# Раз в час воркер заодно чистит просроченные Idempotency-Key и старые записи об удалённых товарах
+PURGE_INTERVAL_SECONDS = 3600
+
+
+class Command(BaseCommand):
+    help = "Send queued order notifications to Telegram (retries with backoff)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain the queue once and exit.")
+        parser.add_argument("--batch-size", type=int, default=10)
+        parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds between polls.")
+        parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS)
+        parser.add_argument(
+            "--async",
+            dest="use_async",
+            action="store_true",
+            help="Send through httpx.AsyncClient (requires httpx).",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        max_attempts = options["max_attempts"]
+        if options["use_async"]:
+            def drain_once(**kwargs):
+                return asyncio.run(adrain(**kwargs))
+        else:
+            drain_once = drain
+
+        if options["once"]:
+            processed = drain_once(batch_size=batch_size, max_attempts=max_attempts)
+            self.stdout.write(self.style.SUCCESS(f"Processed: {processed}"))
+            self._write_stats()
+            return
+
+        self.stdout.write("Telegram worker started")
+        next_purge = 0.0
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    if time.monotonic() >= next_purge:
+                        purge_expired()
+                        purge_tombstones()
+                        next_purge = time.monotonic() + PURGE_INTERVAL_SECONDS
+                    processed = drain_once(batch_size=batch_size, max_attempts=max_attempts)
+                except DatabaseError as e:
+                    # БД недоступна или соединение оборвалось: воркер не падает,
+                    # а после паузы повторяет с новым соединением
+                    self.stderr.write(f"TELEGRAM_WORKER_DB_ERROR: {e!r}")
+                    connections.close_all()
+                    processed = 0
+                if not processed:
+                    time.sleep(options["poll_interval"])
+        except KeyboardInterrupt:
+            self.stdout.write("Telegram worker stopped")
+            self._write_stats()
+
+    def _write_stats(self):
+        stats = telegram_client.stats.as_dict()
+        self.stdout.write("HTTP: " + ", ".join(f"{k}={v}" for k, v in stats.items()))
@@ -0,0 +1,101 @@
+"""
+Простые метрики в памяти процесса и вывод в текстовом формате Prometheus.
+У каждого воркера gunicorn свой набор: /api/metrics показывает метрики
+процесса, который обработал запрос (метка pid помогает их различать).
+"""
+
+import os
+import threading
+from bisect import bisect_left
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+_lock = threading.Lock()
+_histograms: dict[str, "Histogram"] = {}
+_counters: dict[str, dict[tuple, float]] = {}
+_help: dict[str, str] = {}
+
+
+class Histogram:
+    def __init__(self, buckets: tuple) -> None:
+        self.buckets = buckets
+        self.series: dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            # [счётчики по бакетам (+Inf последним), сумма, количество]
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+
+def _labels(labels: dict[str, str]) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def register(name: str, help_text: str, buckets: tuple | None = None) -> None:
+    _help[name] = help_text
+    if buckets is not None:
+        _histograms.setdefault(name, Histogram(buckets))
+    else:
+        _counters.setdefault(name, {})
+
+
+def observe(name: str, value: float, **labels: str) -> None:
+    with _lock:
+        _histograms[name].observe(_labels(labels), value)
+
+
+def inc(name: str, amount: float = 1, **labels: str) -> None:
+    key = _labels(labels)
+    with _lock:
+        series = _counters[name]
+        series[key] = series.get(key, 0) + amount
+
+
+def observe_telegram(url: str, status: int | str, seconds: float) -> None:
+    """Вызов Bot API: метод берётся из конца URL (sendMessage, sendPhoto, ...)."""
+    method = url.rsplit("/", 1)[-1]
+    observe("telegram_request_duration_seconds", seconds, method=method)
+    inc("telegram_requests_total", method=method, status=str(status))
+
+
+def _format_labels(labels: tuple, extra: tuple = ()) -> str:
+    items = labels + extra + (("pid", str(os.getpid())),)
+    parts = []
+    for key, value in items:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def render() -> str:
+    lines: list[str] = []
+    with _lock:
+        for name, histogram in sorted(_histograms.items()):
+            lines.append(f"# HELP {name} {_help[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, (counts, total, count) in sorted(histogram.series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip((*histogram.buckets, "+Inf"), counts):
+                    cumulative += bucket_count
+                    lines.append(f"{name}_bucket{_format_labels(labels, (('le', str(bound)),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        for name, series in sorted(_counters.items()):
+            lines.append(f"# HELP {name} {_help[name]}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in sorted(series.items()):
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+register("http_request_duration_seconds", "Request latency by view.", LATENCY_BUCKETS)
+register("http_request_db_queries", "SQL queries per request by view.", COUNT_BUCKETS)
+register("http_request_db_seconds", "Time spent in SQL per request by view.", LATENCY_BUCKETS)
+register("db_connections_opened_total", "New database connections opened by this process.")
+register("telegram_request_duration_seconds", "Telegram Bot API call latency by method.", LATENCY_BUCKETS)
+register("telegram_requests_total", "Telegram Bot API calls by method and HTTP status.")
@@ -0,0 +1,97 @@
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+from . import metrics
+
+# Счётчики SQL текущего запроса. ContextVar переходит и в потоки sync_to_async,
+# поэтому запросы async-представлений тоже попадают в свой запрос.
+_db_stats: ContextVar[list | None] = ContextVar("shop_db_stats", default=None)
+
+
+def _db_wrapper(execute, sql, params, many, context):
+    current = _db_stats.get()
+    if current is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        current[0] += 1
+        current[1] += time.perf_counter() - start
+
+
+def _install_wrapper(sender, connection, **kwargs):
+    # Соединения у каждого потока свои — обёртку ставим на каждое новое
+    if _db_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_db_wrapper)
+    # Рост этого счётчика вместе с числом запросов — соединения не переиспользуются
+    metrics.inc("db_connections_opened_total", vendor=connection.vendor)
+
+
+connection_created.connect(_install_wrapper, dispatch_uid="shop_metrics_db_wrapper")
+
+
+class RequestMetricsMiddleware:
+    """
+    Время ответа, число SQL-запросов и время в БД по каждому представлению.
+    Пишет в shop.metrics (отдаётся на /api/metrics); при SERVER_TIMING=true
+    добавляет заголовок Server-Timing. Работает и под WSGI, и под ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = getattr(settings, "SERVER_TIMING", False)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        db_stats = [0, 0.0]
+        token = _db_stats.set(db_stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _db_stats.reset(token)
+        self._record(request, response, time.perf_counter() - start, db_stats)
+        return response
+
+    async def __acall__(self, request):
+        db_stats = [0, 0.0]
+        token = _db_stats.set(db_stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _db_stats.reset(token)
+        self._record(request, response, time.perf_counter() - start, db_stats)
+        return response
+
+    def _record(self, request, response, elapsed: float, db_stats: list) -> None:
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match and match.view_name else "unmatched"
+        queries, db_seconds = db_stats
+
+        metrics.observe(
+            "http_request_duration_seconds",
+            elapsed,
+            view=view,
+            method=request.method,
+            status=str(response.status_code),
+        )
+        metrics.observe("http_request_db_queries", queries, view=view)
+        metrics.observe("http_request_db_seconds", db_seconds, view=view)
+
+        if self.server_timing:
+            response["Server-Timing"] = (
+                f'db;dur={db_seconds * 1000:.1f};desc="{queries} queries", '
+                f"total;dur={elapsed * 1000:.1f}"
+            )
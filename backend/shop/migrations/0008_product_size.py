@@ -0,0 +1,56 @@
+# Generated by Django 5.0.10 on 2026-10-17 19:53
+
+import django.db.models.deletion
+import shop.sizes
+import uuid
+from decimal import Decimal, InvalidOperation
+from django.db import migrations, models
+
+
+def backfill_product_sizes(apps, schema_editor):
+    Product = apps.get_model('shop', 'Product')
+    ProductSize = apps.get_model('shop', 'ProductSize')
+
+    rows = []
+    for product in Product.objects.all():
+        tenths = set()
+        for value in product.sizes if isinstance(product.sizes, list) else []:
+            try:
+                d = Decimal(str(value).strip().replace(",", ".")).quantize(Decimal("0.1"))
+            except (InvalidOperation, ValueError):
+                continue
+            if 0 < d < 1000:
+                tenths.add(int(d * 10))
+        rows.extend(ProductSize(product=product, tenths=t) for t in sorted(tenths))
+    ProductSize.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0007_telegram_outbox'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='sizes',
+            field=models.JSONField(validators=[shop.sizes.validate_sizes]),
+        ),
+        migrations.CreateModel(
+            name='ProductSize',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('tenths', models.PositiveSmallIntegerField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='size_options', to='shop.product')),
+            ],
+            options={
+                'ordering': ['tenths'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='productsize',
+            constraint=models.UniqueConstraint(fields=('product', 'tenths'), name='shop_productsize_unique'),
+        ),
+        migrations.RunPython(backfill_product_sizes, migrations.RunPython.noop),
+    ]
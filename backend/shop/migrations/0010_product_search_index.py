@@ -0,0 +1,45 @@
+from django.db import migrations
+
+PG_INDEX_SQL = (
+    "CREATE INDEX IF NOT EXISTS shop_product_search_gin ON shop_product "
+    "USING gin ((to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(description, ''))))"
+)
+FTS_CREATE_SQL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS shop_product_fts USING fts5("
+    "product_id UNINDEXED, title, description, tokenize='unicode61 remove_diacritics 2')"
+)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(PG_INDEX_SQL)
+    elif vendor == 'sqlite':
+        # Без FTS5 поиск работает через icontains
+        try:
+            schema_editor.execute(FTS_CREATE_SQL)
+        except Exception:
+            return
+        schema_editor.execute(
+            "INSERT INTO shop_product_fts (product_id, title, description) "
+            "SELECT id, title, description FROM shop_product"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS shop_product_search_gin")
+    elif vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS shop_product_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0009_product_created_id_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
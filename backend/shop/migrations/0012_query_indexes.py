@@ -0,0 +1,33 @@
+# Generated by Django 5.0.10 on 2026-10-17 20:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0011_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['-created_at'], name='shop_order_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', '-created_at'], name='shop_order_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('in_stock', True)), fields=['-created_at', 'id'], name='shop_product_instock_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productsize',
+            index=models.Index(fields=['tenths', 'product'], name='shop_productsize_tenths_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='orderitem',
+            constraint=models.CheckConstraint(check=models.Q(('qty__gte', 1)), name='shop_orderitem_qty_positive'),
+        ),
+    ]
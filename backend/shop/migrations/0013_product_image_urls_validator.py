@@ -0,0 +1,19 @@
+# Generated by Django 5.0.10 on 2026-10-17 20:11
+
+import shop.images
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0012_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='image_urls',
+            field=models.JSONField(validators=[shop.images.validate_image_urls]),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.10 on 2026-10-17 20:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0013_product_image_urls_validator'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productsize',
+            name='stock_qty',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
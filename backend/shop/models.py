@@ -2,7 +2,12 @@ import uuid
 from decimal import Decimal
 
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .images import validate_image_urls
+from .sizes import normalize_sizes, validate_sizes
 
 
 class Product(models.Model):
@@ -14,19 +19,96 @@ class Product(models.Model):
     currency = models.CharField(max_length=3, default="UZS")
 
     # храните размеры как список в JSON:
-    # [15, 15.5, 16, ...] или ["15", "15.5", ...] — serializer нормализует
-    sizes = models.JSONField()
+    # [15, 15.5, 16, ...] или ["15", "15.5", ...] — при сохранении они
+    # проверяются и раскладываются в ProductSize (десятые доли)
+    sizes = models.JSONField(validators=[validate_sizes])
 
     in_stock = models.BooleanField(default=True)
-    image_urls = models.JSONField()
+    image_urls = models.JSONField(validators=[validate_image_urls])
     created_at = models.DateTimeField(auto_now_add=True)
+    # Лента изменений ?since= (services/catalog_feed.py). auto_now не работает
+    # в QuerySet.update() — там updated_at надо ставить явно
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # keyset-пагинация каталога: ORDER BY created_at DESC, id
+            models.Index(fields=["-created_at", "id"], name="shop_product_created_id_idx"),
+            # каталог с ?in_stock=true: только товары в наличии, в том же порядке
+            models.Index(
+                fields=["-created_at", "id"],
+                name="shop_product_instock_idx",
+                condition=models.Q(in_stock=True),
+            ),
+            models.Index(fields=["updated_at", "id"], name="shop_product_updated_idx"),
+        ]
 
     def __str__(self) -> str:
         return self.title
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = update_fields = {*update_fields, "updated_at"}
+            if "sizes" not in update_fields:
+                return super().save(*args, **kwargs)
+
+        # Неверные размеры отклоняются здесь, а не при оформлении заказа
+        tenths = normalize_sizes(self.sizes)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.sync_size_options(tenths)
+
+    def sync_size_options(self, tenths: list[int]) -> None:
+        wanted = set(tenths)
+        existing = set(self.size_options.values_list("tenths", flat=True))
+        if existing - wanted:
+            self.size_options.filter(tenths__in=existing - wanted).delete()
+        if wanted - existing:
+            ProductSize.objects.bulk_create(
+                [ProductSize(product=self, tenths=t) for t in sorted(wanted - existing)],
+                ignore_conflicts=True,
+            )
+        self.__dict__.pop("size_set", None)
+
+    @cached_property
+    def size_set(self) -> frozenset[int]:
+        """Доступные размеры в десятых долях (используйте prefetch_related("size_options"))."""
+        return frozenset(option.tenths for option in self.size_options.all())
+
+
+class ProductSize(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="size_options")
+    tenths = models.PositiveSmallIntegerField()
+    # Остаток по размеру; пусто — не ведётся (размер всегда доступен).
+    # Списывается при заказе в services/stock.py
+    stock_qty = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["tenths"]
+        constraints = [
+            models.UniqueConstraint(fields=["product", "tenths"], name="shop_productsize_unique"),
+        ]
+        indexes = [
+            # фильтр ?size= в поиске идёт от размера к товарам
+            models.Index(fields=["tenths", "product"], name="shop_productsize_tenths_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.product_id}: {self.tenths / 10}"
+
+
+class ProductTombstone(models.Model):
+    """Удалённый товар для ленты изменений каталога: клиент убирает его из своей копии."""
+
+    product_id = models.UUIDField(primary_key=True)
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self) -> str:
+        return f"{self.product_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
+
 
 class Order(models.Model):
     STATUS_NEW = "new"
@@ -61,6 +143,11 @@ class Order(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # список заказов в админке: сортировка по дате и фильтр по статусу
+            models.Index(fields=["-created_at"], name="shop_order_created_idx"),
+            models.Index(fields=["status", "-created_at"], name="shop_order_status_created_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"Order {self.id}"
@@ -83,5 +170,65 @@ class OrderItem(models.Model):
         validators=[MinValueValidator(Decimal("1.0"))],
     )
 
+    class Meta:
+        constraints = [
+            models.CheckConstraint(check=models.Q(qty__gte=1), name="shop_orderitem_qty_positive"),
+        ]
+
     def __str__(self) -> str:
         return f"{self.title_snapshot} x{self.qty}"
+
+
+class TelegramOutbox(models.Model):
+    """
+    Очередь уведомлений в Telegram (transactional outbox).
+    Запись создаётся в той же транзакции, что и заказ, а отправкой
+    занимается `manage.py telegram_worker`.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="telegram_messages")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["next_attempt_at"]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="shop_outbox_due_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"Telegram {self.order_id} [{self.status}]"
+
+
+
+class IdempotencyKey(models.Model):
+    """
+    Ответ на POST /api/orders/ с заголовком Idempotency-Key. Строка вставляется
+    первой в транзакции заказа: параллельный дубль ждёт на уникальном ключе,
+    а повтор получает сохранённый ответ без новых записей и уведомлений.
+    """
+
+    key = models.CharField(max_length=255, primary_key=True)
+    fingerprint = models.CharField(max_length=64)
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, null=True, related_name="+")
+    response_status = models.PositiveSmallIntegerField(null=True)
+    response_body = models.JSONField(null=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self) -> str:
+        return self.key
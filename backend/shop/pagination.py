@@ -0,0 +1,28 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class ProductCursorPagination(CursorPagination):
+    """
+    Keyset-пагинация по (-created_at, id) — тот же порядок, что и в индексе.
+    Включается только параметрами ?cursor= или ?page_size=, без них
+    /api/products/ по-прежнему отдаёт весь каталог списком.
+    """
+
+    ordering = ("-created_at", "id")
+    page_size = 24
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+class ProductSearchPagination(PageNumberPagination):
+    """Поиск сортируется по релевантности, поэтому здесь обычные страницы."""
+
+    page_size = 24
+    page_size_query_param = "page_size"
+    max_page_size = 100
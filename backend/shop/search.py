@@ -0,0 +1,106 @@
+"""
+Полнотекстовый поиск по title/description.
+
+PostgreSQL: to_tsvector(...) @@ websearch_to_tsquery(...) по GIN-индексу
+shop_product_search_gin (выражение ниже должно совпадать с индексом).
+SQLite: таблица FTS5 shop_product_fts, которую поддерживают сигналы.
+Иначе — icontains.
+"""
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, QuerySet
+from django.db.models.expressions import RawSQL
+
+PG_CONFIG = "simple"
+PG_VECTOR_SQL = (
+    "to_tsvector('simple', coalesce(\"shop_product\".\"title\", '') "
+    "|| ' ' || coalesce(\"shop_product\".\"description\", ''))"
+)
+PG_INDEX_SQL = (
+    "CREATE INDEX IF NOT EXISTS shop_product_search_gin ON shop_product "
+    "USING gin ((to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(description, ''))))"
+)
+
+FTS_TABLE = "shop_product_fts"
+FTS_CREATE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "product_id UNINDEXED, title, description, tokenize='unicode61 remove_diacritics 2')"
+)
+
+_fts_available: bool | None = None
+
+
+def fts_available() -> bool:
+    global _fts_available
+    if connection.vendor != "sqlite":
+        return False
+    if _fts_available is None:
+        with connection.cursor() as cursor:
+            _fts_available = FTS_TABLE in connection.introspection.table_names(cursor)
+    return _fts_available
+
+
+def _fts_query(text: str) -> str:
+    # Каждое слово — отдельный префиксный термин в кавычках: пользовательский ввод
+    # не должен разбираться как синтаксис FTS5
+    terms = [t.replace('"', '""') for t in text.split()]
+    return " ".join(f'"{t}"*' for t in terms)
+
+
+def search_products(queryset: QuerySet, text: str) -> QuerySet:
+    """Фильтрует queryset по тексту; на PostgreSQL добавляет аннотацию search_rank."""
+    text = text.strip()
+    if not text:
+        return queryset
+
+    if connection.vendor == "postgresql":
+        tsquery = f"websearch_to_tsquery('{PG_CONFIG}', %s)"
+        return queryset.filter(
+            RawSQL(f"{PG_VECTOR_SQL} @@ {tsquery}", [text], output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(f"ts_rank({PG_VECTOR_SQL}, {tsquery})", [text], output_field=FloatField())
+        )
+
+    if fts_available():
+        return queryset.filter(
+            RawSQL(
+                f'"shop_product"."id" IN (SELECT product_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)',
+                [_fts_query(text)],
+                output_field=BooleanField(),
+            )
+        )
+
+    q = Q()
+    for term in text.split():
+        q &= Q(title__icontains=term) | Q(description__icontains=term)
+    return queryset.filter(q)
+
+
+def index_product(product) -> None:
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE product_id = %s", [product.pk.hex])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (product_id, title, description) VALUES (%s, %s, %s)",
+            [product.pk.hex, product.title, product.description],
+        )
+
+
+def unindex_product(product) -> None:
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE product_id = %s", [product.pk.hex])
+
+
+def rebuild_index() -> None:
+    """Полная переиндексация (после bulk-операций, которые не шлют сигналы)."""
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (product_id, title, description) "
+            "SELECT id, title, description FROM shop_product"
+        )
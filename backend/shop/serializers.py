@@ -1,16 +1,17 @@
 from __future__ import annotations
 
-from decimal import Decimal, InvalidOperation
+from decimal import Decimal
 from typing import Any
 
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import transaction
 from rest_framework import serializers
 
 from .models import Order, OrderItem, Product
-from .services.telegram_service import send_order_to_telegram
-
-
-DECIMAL_SIZE_QUANT = Decimal("0.1")  # 15.5 -> 15.5 (1 знак после точки)
+from .services import idempotency as idempotency_service
+from .services import stock, thumbnails
+from .services.telegram_outbox import enqueue_order
+from .sizes import parse_size, size_to_tenths
 
 
 def _to_decimal_size(value: Any) -> Decimal:
@@ -18,36 +19,73 @@ def _to_decimal_size(value: Any) -> Decimal:
     Приводит размер к Decimal с 1 знаком после точки.
     Принимает: 15, 15.5, "15.5", "15,5"
     """
-    if value is None:
-        raise serializers.ValidationError("Размер обязателен.")
-
-    s = str(value).strip().replace(",", ".")
     try:
-        d = Decimal(s).quantize(DECIMAL_SIZE_QUANT)
-    except (InvalidOperation, ValueError):
-        raise serializers.ValidationError("Введите правильное число для размера.")
-    if d <= 0:
-        raise serializers.ValidationError("Размер должен быть больше 0.")
-    return d
+        return parse_size(value)
+    except DjangoValidationError as e:
+        raise serializers.ValidationError(e.messages)
+
 
+def line_error(product_slug: str, selected_size: Decimal, product: Product | None) -> str | None:
+    """Почему позицию нельзя заказать (None — можно). Общая проверка заказа и /api/cart/quote."""
+    if not product:
+        return f"Product '{product_slug}' not found or out of stock."
+    if size_to_tenths(selected_size) not in product.size_set:
+        return f"Selected size {selected_size} is not available."
+    if not product.image_urls:
+        return "Product image is required."
+    return None
 
-def _normalize_sizes_list(sizes: Any) -> list[Decimal]:
+
+def _build_order_lines(
+    items_data: list[dict[str, Any]], products_by_slug: dict[str, Product]
+) -> tuple[list[dict[str, Any]], int]:
     """
-    Product.sizes хранится в JSONField (может быть список чисел/строк).
-    Нормализуем всё в Decimal(0.1).
+    Проверяет позиции заказа по заранее загруженным товарам.
+    Возвращает поля для OrderItem и сумму заказа.
     """
-    if not isinstance(sizes, list):
-        return []
-    out: list[Decimal] = []
-    for s in sizes:
-        try:
-            out.append(_to_decimal_size(s))
-        except serializers.ValidationError:
-            continue
-    return out
+    lines: list[dict[str, Any]] = []
+    subtotal = 0
+
+    for item in items_data:
+        product_slug = item["productSlug"]
+        qty = int(item["qty"])
+        selected_size: Decimal = _to_decimal_size(item["selectedSize"])
+
+        product = products_by_slug.get(product_slug)
+        error = line_error(product_slug, selected_size, product)
+        if error:
+            raise serializers.ValidationError({"items": error})
+
+        subtotal += product.price_uzs * qty
+        lines.append(
+            {
+                "product": product,
+                "title_snapshot": product.title,
+                "description_snapshot": product.description,
+                "price_snapshot_uzs": product.price_uzs,
+                "image_url_snapshot": product.image_urls[0],
+                "qty": qty,
+                "selected_size": selected_size,
+            }
+        )
+
+    return lines, subtotal
 
 
 class ProductListSerializer(serializers.ModelSerializer):
+    """Принимает fields=[...], чтобы отдать только часть полей (?fields= в списке)."""
+
+    thumbnail_url = serializers.SerializerMethodField()
+
+    def __init__(self, *args, fields: list[str] | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    def get_thumbnail_url(self, obj) -> str | None:
+        return thumbnails.thumbnail_url(obj.image_urls)
+
     class Meta:
         model = Product
         fields = (
@@ -60,6 +98,7 @@ class ProductListSerializer(serializers.ModelSerializer):
             "sizes",
             "in_stock",
             "image_urls",
+            "thumbnail_url",
             "created_at",
         )
 
@@ -115,63 +154,70 @@ class OrderCreateSerializer(serializers.Serializer):
         return value
 
     def create(self, validated_data: dict[str, Any]) -> Order:
-        customer = validated_data["customer"]
-        items_data = validated_data["items"]
-        meta = validated_data["meta"]
-
-        with transaction.atomic():
-            order = Order.objects.create(
-                customer_name=customer["name"],
-                customer_phone=customer["phone"],
-                customer_address=customer["address"],
-                customer_comment=customer.get("comment", ""),
-                customer_telegram_username=customer.get("telegram_username", ""),
-                subtotal_uzs=0,
-                locale=meta["locale"],
-                theme=meta["theme"],
-                status=Order.STATUS_NEW,
+        # Все товары заказа — одним запросом, проверки — до любых записей в БД
+        products_by_slug = {
+            p.slug: p for p in orderable_products(validated_data["items"])
+        }
+        lines, subtotal = _build_order_lines(validated_data["items"], products_by_slug)
+        return save_order(
+            validated_data, lines, subtotal, idempotency=validated_data.get("idempotency")
+        )
+
+
+def orderable_products(items_data: list[dict[str, Any]]):
+    """Queryset товаров из позиций заказа (в наличии, с размерами)."""
+    slugs = {item["productSlug"] for item in items_data}
+    # order_by(): порядок не нужен, а сортировка по умолчанию (-created_at) стоит лишнего шага
+    return (
+        Product.objects.filter(slug__in=slugs, in_stock=True)
+        .order_by()
+        .prefetch_related("size_options")
+    )
+
+
+def save_order(
+    validated_data: dict[str, Any],
+    lines: list[dict[str, Any]],
+    subtotal: int,
+    idempotency: tuple[str, str] | None = None,
+) -> Order:
+    """
+    Списывает остатки и записывает заказ, позиции и запись outbox в одной транзакции.
+    idempotency — (Idempotency-Key, fingerprint): ключ и ответ сохраняются
+    вместе с заказом; дубль ключа даёт IntegrityError и откат.
+    """
+    customer = validated_data["customer"]
+    meta = validated_data["meta"]
+
+    with transaction.atomic():
+        if idempotency:
+            key_record = idempotency_service.claim(*idempotency)
+        try:
+            stock.reserve(lines)
+        except stock.OutOfStock as e:
+            raise serializers.ValidationError({"items": str(e)})
+        order = Order.objects.create(
+            customer_name=customer["name"],
+            customer_phone=customer["phone"],
+            customer_address=customer["address"],
+            customer_comment=customer.get("comment", ""),
+            customer_telegram_username=customer.get("telegram_username", ""),
+            subtotal_uzs=subtotal,
+            locale=meta["locale"],
+            theme=meta["theme"],
+            status=Order.STATUS_NEW,
+        )
+        OrderItem.objects.bulk_create(
+            [OrderItem(order=order, **line) for line in lines]
+        )
+
+        # Уведомление уходит через outbox: telegram_worker отправит его
+        # после коммита и переведёт заказ в sent/failed
+        enqueue_order(order)
+
+        if idempotency:
+            idempotency_service.store(
+                key_record, order, 201, OrderCreateSerializer().to_representation(order)
             )
 
-            subtotal = 0
-
-            for item in items_data:
-                product_slug = item["productSlug"]
-                qty = int(item["qty"])
-                selected_size: Decimal = _to_decimal_size(item["selectedSize"])
-
-                product = Product.objects.filter(slug=product_slug, in_stock=True).first()
-                if not product:
-                    raise serializers.ValidationError(
-                        {"items": f"Product '{product_slug}' not found or out of stock."}
-                    )
-
-                available_sizes = _normalize_sizes_list(product.sizes)
-                if selected_size not in available_sizes:
-                    raise serializers.ValidationError(
-                        {"items": f"Selected size {selected_size} is not available."}
-                    )
-
-                image_urls = product.image_urls or []
-                if not image_urls:
-                    raise serializers.ValidationError({"items": "Product image is required."})
-
-                line_total = product.price_uzs * qty
-                subtotal += line_total
-
-                OrderItem.objects.create(
-                    order=order,
-                    product=product,
-                    title_snapshot=product.title,
-                    description_snapshot=product.description,
-                    price_snapshot_uzs=product.price_uzs,
-                    image_url_snapshot=image_urls[0],
-                    qty=qty,
-                    selected_size=selected_size,  # ⚠️ это требует изменения модели (см. ниже)
-                )
-
-            order.subtotal_uzs = subtotal
-            order.save(update_fields=["subtotal_uzs"])
-
-        # Отправка в Telegram после успешного коммита
-        send_order_to_telegram(order)
-        return order
+    return order
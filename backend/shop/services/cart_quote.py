@@ -0,0 +1,128 @@
+"""
+POST /api/cart/quote — проверка и расчёт корзины без записи в БД:
+
+    {"items": [{"productSlug": "ring", "qty": 1, "selectedSize": 16.5}]}
+
+Позиции проверяются теми же правилами, что и заказ (line_error, остатки),
+но ошибка одной позиции не прерывает расчёт: у каждой строки своё поле error.
+Товары берутся из снимка в памяти процесса. Он сбрасывается при смене версии
+каталога и не живёт дольше CART_QUOTE_SNAPSHOT_TTL секунд: без Redis версия
+хранится в LocMemCache и про правки через другой воркер не узнаёт. Свежий остаток читается одним запросом, только если в корзине
+есть размеры с учётом остатка. Итог предварительный — окончательно остаток
+списывается при оформлении заказа.
+"""
+
+import threading
+import time
+from collections import Counter
+from typing import Any
+
+from django.conf import settings
+
+from ..models import Product, ProductSize
+from ..serializers import OrderItemInputSerializer, line_error, orderable_products
+from ..sizes import size_to_tenths
+from . import catalog_cache
+from .stock import out_of_stock_message
+
+MAX_QUOTE_ITEMS = 100
+
+_snapshot: dict[str, Product | None] = {}
+_snapshot_version: int | None = None
+_snapshot_expires = 0.0
+_snapshot_lock = threading.Lock()
+
+
+def get_products(slugs: set[str]) -> dict[str, Product | None]:
+    """
+    Товары по slug (None — нет или не в наличии); недостающие догружаются одним
+    запросом. В снимок попадают только найденные товары, так что он не больше каталога.
+    """
+    global _snapshot, _snapshot_version, _snapshot_expires
+    version = catalog_cache.get_version()
+    now = time.monotonic()
+    with _snapshot_lock:
+        if _snapshot_version != version or now >= _snapshot_expires:
+            _snapshot, _snapshot_version = {}, version
+            _snapshot_expires = now + getattr(settings, "CART_QUOTE_SNAPSHOT_TTL", 30)
+        snapshot = _snapshot
+        missing = slugs - snapshot.keys()
+
+    if missing:
+        loaded = {p.slug: p for p in orderable_products([{"productSlug": slug} for slug in missing])}
+        for product in loaded.values():
+            product.size_set  # считаем заранее: объект читают параллельные запросы
+        with _snapshot_lock:
+            snapshot.update(loaded)
+    return {slug: snapshot.get(slug) for slug in slugs}
+
+
+def parse_items(data: Any) -> list:
+    items = data.get("items") if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        raise ValueError("items must be a non-empty list.")
+    if len(items) > MAX_QUOTE_ITEMS:
+        raise ValueError(f"At most {MAX_QUOTE_ITEMS} items per quote.")
+    return items
+
+
+def _stock_left(products: list[Product]) -> dict[tuple[Any, int], int]:
+    """Текущий остаток размеров с учётом — один запрос на чтение."""
+    ids = [
+        p.pk for p in products if any(option.stock_qty is not None for option in p.size_options.all())
+    ]
+    if not ids:
+        return {}
+    rows = ProductSize.objects.filter(product_id__in=ids, stock_qty__isnull=False)
+    return {(pid, tenths): qty for pid, tenths, qty in rows.values_list("product_id", "tenths", "stock_qty")}
+
+
+def _first_error(errors: dict) -> str:
+    field, messages = next(iter(errors.items()))
+    return f"{field}: {messages[0]}"
+
+
+def quote(items: list) -> dict[str, Any]:
+    parsed = []
+    for raw in items:
+        serializer = OrderItemInputSerializer(data=raw)
+        parsed.append((raw, serializer.validated_data if serializer.is_valid() else None, serializer.errors))
+
+    products = get_products({item["productSlug"] for _, item, _ in parsed if item})
+    left = _stock_left([p for p in products.values() if p is not None])
+
+    # Одинаковые товар и размер в нескольких строках делят один остаток
+    wanted: Counter = Counter()
+    lines = []
+    subtotal = 0
+    for raw, item, errors in parsed:
+        if item is None:
+            raw = raw if isinstance(raw, dict) else {}
+            lines.append({
+                "productSlug": raw.get("productSlug"),
+                "qty": raw.get("qty"),
+                "selectedSize": raw.get("selectedSize"),
+                "error": _first_error(errors) if errors else "Invalid item.",
+            })
+            continue
+
+        slug, qty, size = item["productSlug"], item["qty"], item["selectedSize"]
+        product = products[slug]
+        error = line_error(slug, size, product)
+        if error is None:
+            key = (product.pk, size_to_tenths(size))
+            wanted[key] += qty
+            if key in left and wanted[key] > left[key]:
+                error = out_of_stock_message(slug, key[1])
+
+        line = {"productSlug": slug, "qty": qty, "selectedSize": str(size), "error": error}
+        if error is None:
+            line.update(title=product.title, price_uzs=product.price_uzs, line_total_uzs=product.price_uzs * qty)
+            subtotal += product.price_uzs * qty
+        lines.append(line)
+
+    return {
+        "ok": all(line["error"] is None for line in lines),
+        "subtotal_uzs": subtotal,
+        "lines": lines,
+    }
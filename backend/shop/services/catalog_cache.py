@@ -0,0 +1,105 @@
+"""
+Кэш каталога товаров: готовые JSON-байты в кэше Django и небольшой
+LRU в памяти процесса перед ним. Версия каталога хранится в общем кэше
+и меняется при любом сохранении/удалении товара (см. shop.signals).
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+VERSION_KEY = "shop:catalog:version"
+ENTRY_KEY = "shop:catalog:{version}:{variant}"
+
+
+class CatalogEntry(NamedTuple):
+    body: bytes
+    etag: str
+    last_modified: float
+    expires_at: float
+
+
+class _LocalLRU:
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, CatalogEntry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> CatalogEntry | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: CatalogEntry) -> None:
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_local = _LocalLRU(maxsize=getattr(settings, "CATALOG_LRU_SIZE", 16))
+
+
+def _ttl() -> int:
+    return getattr(settings, "CATALOG_CACHE_TTL", 300)
+
+
+def get_version() -> int:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate() -> None:
+    """Новая версия каталога: все ранее отрендеренные варианты становятся недоступны."""
+    cache.set(VERSION_KEY, max(int(time.time() * 1000), (cache.get(VERSION_KEY) or 0) + 1), None)
+    _local.clear()
+
+
+def _make_entry(body: bytes, version: int) -> CatalogEntry:
+    return CatalogEntry(
+        body=body,
+        etag='"%s"' % hashlib.sha1(body).hexdigest(),
+        last_modified=version / 1000,
+        expires_at=time.time() + _ttl(),
+    )
+
+
+def get_catalog(render: Callable[[], bytes], variant: str = "all") -> CatalogEntry:
+    """
+    Возвращает отрендеренный каталог для текущей версии.
+    render() вызывается только при промахе по обоим уровням кэша.
+    """
+    version = get_version()
+    key = ENTRY_KEY.format(version=version, variant=variant)
+
+    entry = _local.get(key)
+    if entry is not None:
+        return entry
+
+    entry = cache.get(key)
+    if entry is None:
+        entry = _make_entry(render(), version)
+        cache.set(key, entry, _ttl())
+    # Локальная копия истекает вместе с общей, поэтому даже с LocMemCache
+    # другие процессы увидят изменения не позже чем через TTL
+    _local.put(key, entry)
+    return entry
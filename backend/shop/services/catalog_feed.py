@@ -0,0 +1,103 @@
+"""
+Лента изменений каталога: GET /api/products/?since=<cursor>.
+
+    {"cursor": "...", "reset": false, "changed": [товары как в /api/products/], "deleted": [id]}
+
+changed — товары с updated_at не раньше курсора (в том числе снятые с продажи:
+они приходят с in_stock=false), deleted — ProductTombstone удалённых товаров.
+since=0 — полный снимок и первый курсор.
+
+Курсор — время запроса минус FEED_LAG_SECONDS: транзакция, начатая до запроса,
+может закоммитить строку с более ранним updated_at уже после него, поэтому
+соседние ответы перекрываются на это окно. Клиент применяет изменения как upsert,
+повтор строки ему не мешает. Курсор старше FEED_RETENTION_DAYS (надгробия уже
+удалены) даёт reset=true и полный снимок.
+
+Полный снимок (since=0 и reset) рендерится один раз на версию каталога и
+отдаётся из catalog_cache с ETag, как сам /api/products/; его курсор — время
+рендера минус FEED_LAG_SECONDS, поэтому он остаётся верным и для копии из кэша.
+"""
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from ..fast_serializers import product_values, serialize_product_rows
+from ..models import ProductTombstone
+
+FEED_LAG_SECONDS = 60
+
+
+def _retention() -> timedelta:
+    return timedelta(days=getattr(settings, "CATALOG_FEED_RETENTION_DAYS", 30))
+
+
+def encode_cursor(moment: datetime) -> str:
+    return str(int(moment.timestamp() * 1_000_000))
+
+
+def decode_cursor(value: str) -> datetime | None:
+    """None — с начала (since=0). Неверный курсор — ValueError (ответ 400)."""
+    try:
+        micros = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("since must be a cursor returned by a previous response.")
+    if micros <= 0:
+        return None
+    try:
+        return datetime.fromtimestamp(micros / 1_000_000, tz=dt_timezone.utc)
+    except (OverflowError, OSError, ValueError):
+        raise ValueError("since must be a cursor returned by a previous response.")
+
+
+def _expired(since: datetime, now: datetime) -> bool:
+    return since < now - _retention()
+
+
+def snapshot_variant(since: datetime | None) -> str | None:
+    """Вариант catalog_cache для полного снимка; None — ответ с изменениями (не кэшируется)."""
+    if since is None:
+        return "feed"
+    if _expired(since, timezone.now()):
+        return "feed-reset"
+    return None
+
+
+def changes(queryset, since: datetime | None):
+    """(товары, id удалённых, новый курсор, reset); queryset — товары каталога."""
+    now = timezone.now()
+    cursor = encode_cursor(now - timedelta(seconds=FEED_LAG_SECONDS))
+    reset = since is not None and _expired(since, now)
+    if since is None or reset:
+        return queryset, [], cursor, reset
+
+    deleted = [
+        str(pk)
+        for pk in ProductTombstone.objects.filter(deleted_at__gte=since)
+        .order_by("deleted_at")
+        .values_list("product_id", flat=True)
+    ]
+    # По индексу shop_product_updated_idx
+    changed = queryset.filter(updated_at__gte=since).order_by("updated_at", "id")
+    return changed, deleted, cursor, False
+
+
+def feed(queryset, since: datetime | None) -> dict:
+    """Тело ответа ленты; товары — тем же быстрым путём, что и каталог."""
+    products, deleted, cursor, reset = changes(queryset, since)
+    return {
+        "cursor": cursor,
+        "reset": reset,
+        "changed": serialize_product_rows(product_values(products)),
+        "deleted": deleted,
+    }
+
+
+def record_deleted(product_id) -> None:
+    ProductTombstone.objects.update_or_create(product_id=product_id, defaults={"deleted_at": timezone.now()})
+
+
+def purge_tombstones() -> int:
+    deleted, _ = ProductTombstone.objects.filter(deleted_at__lt=timezone.now() - _retention()).delete()
+    return deleted
@@ -0,0 +1,102 @@
+"""
+Заголовок Idempotency-Key для POST /api/orders/: повтор того же запроса
+возвращает сохранённый ответ, а не создаёт второй заказ.
+"""
+
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.utils import timezone
+
+from ..models import IdempotencyKey, Order
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyError(Exception):
+    """Ключ нельзя использовать: ответ — 400 или 422 с текстом ошибки."""
+
+    def __init__(self, message: str, status: int) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def _ttl() -> timedelta:
+    return timedelta(hours=getattr(settings, "IDEMPOTENCY_KEY_TTL_HOURS", 24))
+
+
+def get_key(headers) -> str | None:
+    key = (headers.get(HEADER) or "").strip()
+    if not key:
+        return None
+    if len(key) > MAX_KEY_LENGTH:
+        raise IdempotencyError(f"{HEADER} must be at most {MAX_KEY_LENGTH} characters.", 400)
+    return key
+
+
+def fingerprint(data) -> str:
+    """Хэш тела запроса: тот же ключ с другим заказом — ошибка клиента."""
+    raw = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def find(key: str, request_fingerprint: str) -> IdempotencyKey | None:
+    """Сохранённый ответ по ключу или None. Просроченный ключ удаляется и не мешает новому заказу."""
+    record = IdempotencyKey.objects.filter(key=key).first()
+    if record is None:
+        return None
+    if record.created_at < timezone.now() - _ttl():
+        record.delete()
+        return None
+    if record.fingerprint != request_fingerprint:
+        raise IdempotencyError(f"{HEADER} was already used with a different request.", 422)
+    return record
+
+
+def find_many(fingerprints: dict[str, str]) -> dict[str, IdempotencyKey | IdempotencyError]:
+    """find() для пачки ключей {key: fingerprint} одним запросом; ключей без ответа в результате нет."""
+    expired_before = timezone.now() - _ttl()
+    found: dict[str, IdempotencyKey | IdempotencyError] = {}
+    expired = []
+    for record in IdempotencyKey.objects.filter(key__in=fingerprints):
+        if record.created_at < expired_before:
+            expired.append(record.key)
+        elif record.fingerprint != fingerprints[record.key]:
+            found[record.key] = IdempotencyError(f"{HEADER} was already used with a different request.", 422)
+        else:
+            found[record.key] = record
+    if expired:
+        IdempotencyKey.objects.filter(key__in=expired).delete()
+    return found
+
+
+def claim(key: str, request_fingerprint: str) -> IdempotencyKey:
+    """Вызывать первым внутри transaction.atomic() заказа — дубль ждёт коммита на этой вставке."""
+    return IdempotencyKey.objects.create(key=key, fingerprint=request_fingerprint)
+
+
+def store(record: IdempotencyKey, order: Order, status: int, body: dict) -> None:
+    record.order = order
+    record.response_status = status
+    record.response_body = body
+    record.save(update_fields=["order", "response_status", "response_body"])
+
+
+def find_after_conflict(key: str, request_fingerprint: str, error: IntegrityError) -> IdempotencyKey:
+    """
+    Вставка ключа упала: параллельный запрос с тем же ключом уже закоммитил заказ.
+    Если строки ключа нет — ошибка была не про ключ, пробрасываем её.
+    """
+    record = find(key, request_fingerprint)
+    if record is None:
+        raise error
+    return record
+
+
+def purge_expired() -> int:
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=timezone.now() - _ttl()).delete()
+    return deleted
@@ -0,0 +1,102 @@
+"""
+POST /api/orders/batch — очередь заказов фронтенда одним запросом:
+
+    {"orders": [{"idempotency_key": "<id заказа в очереди>", "order": {...как в POST /api/orders/}}]}
+
+Ключи и товары всей пачки загружаются одним запросом каждый. Каждый заказ
+с записью outbox коммитится в своей транзакции, как в POST /api/orders/:
+ошибка одного не откатывает остальные, а строки остатков не остаются
+заблокированными до конца пачки (иначе порядок блокировок из stock.reserve
+нарушался бы между заказами). Ключ не может повторяться внутри одной пачки.
+Ответ — результат по каждому заказу в том же порядке, со статусом и телом,
+которые вернул бы POST /api/orders/ для этого заказа.
+"""
+
+from typing import Any
+
+from django.db import IntegrityError
+from rest_framework import serializers
+
+from ..serializers import OrderCreateSerializer, _build_order_lines, orderable_products, save_order
+from . import idempotency
+
+MAX_BATCH_ORDERS = 50
+
+
+def parse_batch(data: Any) -> list[tuple[str | None, Any]]:
+    """[(ключ, тело заказа)]; неверная форма пачки — ValueError (ответ 400)."""
+    orders = data.get("orders") if isinstance(data, dict) else None
+    if not isinstance(orders, list) or not orders:
+        raise ValueError("orders must be a non-empty list.")
+    if len(orders) > MAX_BATCH_ORDERS:
+        raise ValueError(f"At most {MAX_BATCH_ORDERS} orders per batch.")
+    entries = []
+    seen: set[str] = set()
+    for entry in orders:
+        if not isinstance(entry, dict) or not isinstance(entry.get("order"), dict):
+            raise ValueError('Each entry must be {"idempotency_key": "...", "order": {...}}.')
+        key = entry.get("idempotency_key")
+        if key is not None and not isinstance(key, str):
+            raise ValueError("idempotency_key must be a string.")
+        try:
+            key = idempotency.get_key({idempotency.HEADER: key})
+        except idempotency.IdempotencyError as e:
+            raise ValueError(str(e))
+        if key:
+            if key in seen:
+                raise ValueError(f"Duplicate idempotency_key in batch: {key}")
+            seen.add(key)
+        entries.append((key, entry["order"]))
+    return entries
+
+
+def _replayed(record) -> dict[str, Any]:
+    return {"status": record.response_status, "body": record.response_body, "replayed": True}
+
+
+def create_orders(entries: list[tuple[str | None, Any]]) -> list[dict[str, Any]]:
+    results: list[dict[str, Any] | None] = [None] * len(entries)
+    fingerprints = {key: idempotency.fingerprint(order) for key, order in entries if key}
+    known = idempotency.find_many(fingerprints)
+
+    pending = []
+    for index, (key, order) in enumerate(entries):
+        record = known.get(key) if key else None
+        if isinstance(record, idempotency.IdempotencyError):
+            results[index] = {"status": record.status, "body": {"detail": str(record)}}
+        elif record is not None:
+            results[index] = _replayed(record)
+        else:
+            serializer = OrderCreateSerializer(data=order)
+            if serializer.is_valid():
+                pending.append((index, key, serializer))
+            else:
+                results[index] = {"status": 400, "body": serializer.errors}
+
+    products_by_slug = {
+        p.slug: p
+        for p in orderable_products([item for _, _, s in pending for item in s.validated_data["items"]])
+    }
+
+    for index, key, serializer in pending:
+        validated = serializer.validated_data
+        try:
+            lines, subtotal = _build_order_lines(validated["items"], products_by_slug)
+            order = save_order(validated, lines, subtotal, idempotency=(key, fingerprints[key]) if key else None)
+        except serializers.ValidationError as e:
+            results[index] = {"status": 400, "body": e.detail}
+            continue
+        except IntegrityError as e:
+            # Ключ занят параллельным запросом
+            if not key:
+                raise
+            try:
+                results[index] = _replayed(idempotency.find_after_conflict(key, fingerprints[key], e))
+            except idempotency.IdempotencyError as conflict:
+                results[index] = {"status": conflict.status, "body": {"detail": str(conflict)}}
+            continue
+        results[index] = {"status": 201, "body": serializer.to_representation(order)}
+
+    return [
+        {"idempotency_key": key, **result} for (key, _), result in zip(entries, results)
+    ]
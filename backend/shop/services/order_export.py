@@ -0,0 +1,176 @@
+"""
+Выгрузка заказов для бухгалтерии: CSV (строка на позицию) или NDJSON (строка на заказ).
+Заказы читаются пачками через iterator()/aiterator() — на PostgreSQL это серверный
+курсор, позиции подгружаются одним запросом на пачку, память не растёт с объёмом.
+"""
+
+import csv
+import json
+from datetime import date, datetime, time, timedelta
+
+from django.db.models import Prefetch
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from ..models import Order, OrderItem
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+CHUNK_SIZE = 500
+
+CSV_HEADER = [
+    "order_id",
+    "created_at",
+    "status",
+    "customer_name",
+    "customer_phone",
+    "customer_address",
+    "subtotal_uzs",
+    "item_title",
+    "item_price_uzs",
+    "qty",
+    "selected_size",
+    "line_total_uzs",
+]
+
+
+def _parse_day(value: str | None, name: str) -> date | None:
+    if not value:
+        return None
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise ValueError(f"{name} must be a date in YYYY-MM-DD format.")
+    return day
+
+
+def _start_of_day(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def export_queryset(date_from: str | None = None, date_to: str | None = None, status: str | None = None):
+    """Заказы за период [date_from, date_to] включительно (по времени магазина), старые первыми."""
+    start = _parse_day(date_from, "from")
+    end = _parse_day(date_to, "to")
+    if status and status not in dict(Order.STATUS_CHOICES):
+        raise ValueError(f"Unknown status {status!r}.")
+
+    queryset = Order.objects.order_by("created_at", "id")
+    # Диапазон по created_at — по индексу shop_order_created_idx
+    if start:
+        queryset = queryset.filter(created_at__gte=_start_of_day(start))
+    if end:
+        queryset = queryset.filter(created_at__lt=_start_of_day(end + timedelta(days=1)))
+    if status:
+        queryset = queryset.filter(status=status)
+
+    items = OrderItem.objects.only(
+        "order_id", "product_id", "title_snapshot", "price_snapshot_uzs", "qty", "selected_size"
+    ).order_by("title_snapshot", "id")
+    return queryset.prefetch_related(Prefetch("items", queryset=items))
+
+
+class _Echo:
+    """csv.writer пишет строку сюда и сразу получает её обратно."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+# С этих символов Excel и LibreOffice начинают формулу
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _text(value: str) -> str:
+    """
+    Текст из формы заказа для CSV: значение, похожее на формулу, получает
+    префикс ' и открывается в таблице как текст (телефон +998… тоже).
+    """
+    return f"'{value}" if value.startswith(FORMULA_PREFIXES) else value
+
+
+def _csv_rows(order: Order, writer) -> list[str]:
+    created_at = timezone.localtime(order.created_at).isoformat()
+    return [
+        writer.writerow([
+            order.id,
+            created_at,
+            order.status,
+            _text(order.customer_name),
+            _text(order.customer_phone),
+            _text(order.customer_address),
+            order.subtotal_uzs,
+            _text(item.title_snapshot),
+            item.price_snapshot_uzs,
+            item.qty,
+            item.selected_size,
+            item.price_snapshot_uzs * item.qty,
+        ])
+        for item in order.items.all()
+    ]
+
+
+def _ndjson_line(order: Order) -> str:
+    return json.dumps(
+        {
+            "id": str(order.id),
+            "created_at": timezone.localtime(order.created_at).isoformat(),
+            "status": order.status,
+            "customer": {
+                "name": order.customer_name,
+                "phone": order.customer_phone,
+                "address": order.customer_address,
+                "comment": order.customer_comment,
+                "telegram_username": order.customer_telegram_username,
+            },
+            "subtotal_uzs": order.subtotal_uzs,
+            "locale": order.locale,
+            "items": [
+                {
+                    "product_id": str(item.product_id),
+                    "title": item.title_snapshot,
+                    "price_uzs": item.price_snapshot_uzs,
+                    "qty": item.qty,
+                    "selected_size": str(item.selected_size),
+                }
+                for item in order.items.all()
+            ],
+        },
+        ensure_ascii=False,
+    ) + "\n"
+
+
+def iter_export(queryset, fmt: str):
+    """Генератор строк выгрузки — для StreamingHttpResponse под WSGI и для команды."""
+    if fmt == "csv":
+        writer = csv.writer(_Echo())
+        yield writer.writerow(CSV_HEADER)
+        for order in queryset.iterator(chunk_size=CHUNK_SIZE):
+            yield "".join(_csv_rows(order, writer))
+    else:
+        for order in queryset.iterator(chunk_size=CHUNK_SIZE):
+            yield _ndjson_line(order)
+
+
+async def aiter_export(queryset, fmt: str):
+    """
+    То же для views.orders_export под ASGI: синхронный итератор ответа Django
+    там собирает в список целиком, поэтому здесь aiterator().
+    """
+    if fmt == "csv":
+        writer = csv.writer(_Echo())
+        yield writer.writerow(CSV_HEADER)
+        async for order in queryset.aiterator(chunk_size=CHUNK_SIZE):
+            yield "".join(_csv_rows(order, writer))
+    else:
+        async for order in queryset.aiterator(chunk_size=CHUNK_SIZE):
+            yield _ndjson_line(order)
+
+
+def filename(fmt: str, date_from: str | None, date_to: str | None) -> str:
+    period = "-".join(part for part in (date_from, date_to) if part) or "all"
+    return f"orders-{period}.{fmt}"
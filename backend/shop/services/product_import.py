@@ -0,0 +1,179 @@
+"""
+Массовая загрузка товаров из CSV/JSON: проверка всех строк, затем upsert по slug
+пачками через bulk_create(update_conflicts=True). Сигналы post_save при этом
+не срабатывают, поэтому размеры, поисковый индекс и кэш каталога
+обновляются здесь — один раз на всю загрузку.
+"""
+
+import csv
+import json
+from dataclasses import dataclass, field
+from decimal import Decimal
+from pathlib import Path
+from typing import Any
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_slug
+from django.db import transaction
+
+from .. import search
+from ..images import normalize_image_urls
+from ..models import Product, ProductSize
+from ..sizes import normalize_sizes, tenths_to_size
+from . import catalog_cache
+
+BATCH_SIZE = 500
+UPDATE_FIELDS = ["title", "description", "price_uzs", "currency", "sizes", "in_stock", "image_urls", "updated_at"]
+TRUE_VALUES = {"1", "true", "yes", "y", "да", "+"}
+FALSE_VALUES = {"0", "false", "no", "n", "нет", "-"}
+
+
+@dataclass
+class ImportResult:
+    products: list[Product] = field(default_factory=list)
+    tenths: dict[str, list[int]] = field(default_factory=dict)
+    errors: list[str] = field(default_factory=list)
+    created: int = 0
+    updated: int = 0
+
+
+def read_rows(path: str, fmt: str | None = None) -> list[dict[str, Any]]:
+    """Строки файла как словари. Формат — по расширению, если не указан."""
+    fmt = fmt or Path(path).suffix.lstrip(".").lower()
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if fmt == "json":
+            data = json.load(f)
+            if not isinstance(data, list):
+                raise ValueError("JSON must be a list of products.")
+            return data
+        if fmt == "csv":
+            return list(csv.DictReader(f))
+    raise ValueError(f"Unsupported format {fmt!r}; use csv or json.")
+
+
+def _split(value: Any) -> list:
+    """Списки в CSV: JSON-массив или значения через ; | или пробел (запятая — десятичная)."""
+    if isinstance(value, list):
+        return value
+    text = str(value or "").strip()
+    if text.startswith("["):
+        try:
+            return json.loads(text)
+        except ValueError:
+            raise ValidationError(f"Неверный JSON-список: {text!r}.")
+    for separator in ("|", ";"):
+        text = text.replace(separator, " ")
+    return text.split()
+
+
+def _bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = str(value if value is not None else "").strip().lower()
+    if not text or text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValidationError(f"Неверное значение in_stock: {value!r}.")
+
+
+def _sizes_json(tenths: list[int]) -> list:
+    """Размеры в виде, как их вводят в админке: [15, 15.5, 16]."""
+    return [t // 10 if t % 10 == 0 else float(tenths_to_size(t)) for t in tenths]
+
+
+def build_product(row: dict[str, Any]) -> tuple[Product, list[int]]:
+    """Проверяет строку по тем же правилам, что Product.save(). Ошибки — ValidationError."""
+    slug = str(row.get("slug") or "").strip()
+    validate_slug(slug)
+    title = str(row.get("title") or "").strip()
+    if not title:
+        raise ValidationError("title обязателен.")
+    if len(title) > Product._meta.get_field("title").max_length:
+        raise ValidationError("title слишком длинный.")
+    try:
+        price = int(Decimal(str(row.get("price_uzs")).strip()))
+    except Exception:
+        raise ValidationError(f"Неверная цена: {row.get('price_uzs')!r}.")
+    if price < 0:
+        raise ValidationError("Цена не может быть отрицательной.")
+
+    tenths = normalize_sizes(_split(row.get("sizes")))
+    image_urls = normalize_image_urls(_split(row.get("image_urls")))
+    product = Product(
+        slug=slug,
+        title=title,
+        description=str(row.get("description") or ""),
+        price_uzs=price,
+        currency=(str(row.get("currency") or "").strip() or "UZS")[:3],
+        sizes=_sizes_json(tenths),
+        in_stock=_bool(row.get("in_stock")),
+        image_urls=image_urls,
+    )
+    return product, tenths
+
+
+def validate_rows(rows: list[dict[str, Any]]) -> ImportResult:
+    result = ImportResult()
+    seen: set[str] = set()
+    for number, row in enumerate(rows, start=1):
+        try:
+            if not isinstance(row, dict):
+                raise ValidationError("Ожидается объект с полями товара.")
+            product, tenths = build_product(row)
+            if product.slug in seen:
+                raise ValidationError(f"slug {product.slug!r} повторяется в файле.")
+        except ValidationError as e:
+            result.errors.append(f"row {number}: {'; '.join(e.messages)}")
+            continue
+        seen.add(product.slug)
+        result.products.append(product)
+        result.tenths[product.slug] = tenths
+    return result
+
+
+def _sync_sizes(ids_by_slug: dict[str, Any], tenths_by_slug: dict[str, list[int]]) -> None:
+    """Приводит ProductSize пачки товаров к нужным размерам: два-три запроса на пачку."""
+    wanted = {ids_by_slug[slug]: set(tenths) for slug, tenths in tenths_by_slug.items()}
+    stale = []
+    existing: dict[Any, set[int]] = {pk: set() for pk in wanted}
+    for pk, product_id, tenths in ProductSize.objects.filter(product_id__in=wanted).values_list(
+        "pk", "product_id", "tenths"
+    ):
+        existing[product_id].add(tenths)
+        if tenths not in wanted[product_id]:
+            stale.append(pk)
+    if stale:
+        ProductSize.objects.filter(pk__in=stale).delete()
+    ProductSize.objects.bulk_create(
+        [
+            ProductSize(product_id=product_id, tenths=t)
+            for product_id, tenths in wanted.items()
+            for t in sorted(tenths - existing[product_id])
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def import_products(result: ImportResult, batch_size: int = BATCH_SIZE) -> ImportResult:
+    """Upsert проверенных товаров одной транзакцией; кэш и поиск обновляются после коммита."""
+    with transaction.atomic():
+        for start in range(0, len(result.products), batch_size):
+            batch = result.products[start:start + batch_size]
+            slugs = [p.slug for p in batch]
+            known = set(Product.objects.filter(slug__in=slugs).values_list("slug", flat=True))
+            Product.objects.bulk_create(
+                batch,
+                update_conflicts=True,
+                unique_fields=["slug"],
+                update_fields=UPDATE_FIELDS,
+            )
+            # id у существующих товаров остаётся прежним — берём из БД
+            ids_by_slug = dict(Product.objects.filter(slug__in=slugs).values_list("slug", "id"))
+            _sync_sizes(ids_by_slug, {slug: result.tenths[slug] for slug in slugs})
+            result.updated += len(known)
+            result.created += len(batch) - len(known)
+
+        transaction.on_commit(search.rebuild_index)
+        transaction.on_commit(catalog_cache.invalidate)
+    return result
@@ -0,0 +1,105 @@
+"""
+Остатки по размерам (ProductSize.stock_qty; NULL — остаток не ведётся).
+
+Резерв — условный UPDATE ... SET stock_qty = stock_qty - n WHERE stock_qty >= n
+на каждую пару (товар, размер), без select_for_update: строку блокирует
+сам UPDATE до конца транзакции заказа. Строки обновляются в одном порядке
+(product_id, tenths), поэтому два заказа с общими позициями ждут друг друга,
+а не взаимоблокируются.
+
+Товар, у которого закончились все размеры, снимается с продажи (in_stock=False)
+и возвращается, когда в админке размер пополняют с нуля.
+"""
+
+from collections import Counter
+from typing import Any
+
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from ..models import Product, ProductSize
+from ..sizes import size_to_tenths
+from . import catalog_cache
+
+
+class OutOfStock(Exception):
+    pass
+
+
+def out_of_stock_message(slug: str, tenths: int) -> str:
+    return f"Size {tenths / 10:g} of '{slug}' is out of stock."
+
+
+def _wanted(lines: list[dict[str, Any]]) -> Counter:
+    wanted: Counter = Counter()
+    for line in lines:
+        wanted[(line["product"].pk, size_to_tenths(line["selected_size"]))] += line["qty"]
+    return wanted
+
+
+def _tracked(lines: list[dict[str, Any]]) -> set[tuple[Any, int]]:
+    """Пары с учётом остатка — по уже загруженным size_options, без запроса."""
+    return {
+        (option.product_id, option.tenths)
+        for line in lines
+        for option in line["product"].size_options.all()
+        if option.stock_qty is not None
+    }
+
+
+def reserve(lines: list[dict[str, Any]]) -> None:
+    """
+    Списывает остатки под позиции заказа. Вызывается внутри transaction.atomic()
+    заказа: при OutOfStock всё, что уже списано, откатывается вместе с заказом.
+    """
+    tracked = _tracked(lines)
+    slugs = {line["product"].pk: line["product"].slug for line in lines}
+    reserved = set()
+    for (product_id, tenths), qty in sorted(_wanted(lines).items(), key=lambda kv: (str(kv[0][0]), kv[0][1])):
+        if (product_id, tenths) not in tracked:
+            continue
+        rows = ProductSize.objects.filter(product_id=product_id, tenths=tenths, stock_qty__gte=qty)
+        if rows.update(stock_qty=F("stock_qty") - qty):
+            reserved.add(product_id)
+            continue
+        # 0 строк: остатка не хватило — или учёт по размеру выключили после загрузки товара
+        if ProductSize.objects.filter(product_id=product_id, tenths=tenths, stock_qty__isnull=False).exists():
+            raise OutOfStock(out_of_stock_message(slugs[product_id], tenths))
+
+    if reserved:
+        mark_sold_out(reserved)
+
+
+def mark_sold_out(product_ids) -> int:
+    """
+    in_stock=False у товаров, где все размеры учитываются и закончились.
+    Каталог сбрасывается после коммита, только если что-то поменялось.
+    """
+    has_stock = ProductSize.objects.filter(product=OuterRef("pk")).filter(
+        Q(stock_qty__isnull=True) | Q(stock_qty__gt=0)
+    )
+    updated = (
+        Product.objects.filter(pk__in=product_ids, in_stock=True)
+        .filter(~Exists(has_stock))
+        .update(in_stock=False, updated_at=timezone.now())
+    )
+    if updated:
+        transaction.on_commit(catalog_cache.invalidate)
+    return updated
+
+
+def mark_restocked(product_ids) -> int:
+    """
+    Обратное к mark_sold_out: in_stock=True у снятых товаров, где у какого-то
+    размера снова есть остаток. Вызывается при пополнении остатка в админке.
+    """
+    restocked = ProductSize.objects.filter(product=OuterRef("pk"), stock_qty__gt=0)
+    updated = (
+        Product.objects.filter(pk__in=product_ids, in_stock=False)
+        .filter(Exists(restocked))
+        .update(in_stock=True, updated_at=timezone.now())
+    )
+    if updated:
+        transaction.on_commit(catalog_cache.invalidate)
+    return updated
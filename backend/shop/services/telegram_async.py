@@ -0,0 +1,139 @@
+"""
+Асинхронный вариант отправки заказа в Telegram на httpx.AsyncClient.
+Формат сообщений, порядок (текст, затем пачки фото по очереди) и лимит
+на чат — те же, что в telegram_service.
+"""
+
+import json
+import time
+
+from .. import metrics
+from ..models import Order, OrderItem
+from .telegram_client import MAX_429_RETRIES, REQUEST_TIMEOUT, _retry_after, chat_bucket
+from .telegram_service import (
+    MEDIA_GROUP_LIMIT,
+    TELEGRAM_API_URL,
+    TelegramConfigError,
+    TelegramError,
+    _build_message,
+    _chunked,
+    _get_config,
+    _unique_photo_urls,
+    redact,
+)
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - httpx нужен только для async-пути
+    httpx = None
+
+
+def make_client():
+    """Один клиент на event loop: keep-alive пул переиспользуется всеми отправками."""
+    if httpx is None:
+        raise TelegramError("httpx is not installed")
+    return httpx.AsyncClient(
+        timeout=REQUEST_TIMEOUT,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+    )
+
+
+async def _post(client, url: str, data: dict):
+    bucket = chat_bucket(data["chat_id"])
+    for attempt in range(MAX_429_RETRIES + 1):
+        await bucket.aacquire()
+        start = time.perf_counter()
+        try:
+            resp = await client.post(url, data=data)
+        except httpx.HTTPError:
+            metrics.observe_telegram(url, "error", time.perf_counter() - start)
+            raise
+        metrics.observe_telegram(url, resp.status_code, time.perf_counter() - start)
+        if resp.status_code != 429 or attempt == MAX_429_RETRIES:
+            return resp
+        delay = _retry_after(resp)
+        print("TELEGRAM_RATE_LIMITED: retry after", delay)
+        bucket.pause(delay)
+    return resp
+
+
+async def _send_photo_links(client, base_url: str, chat_id: str, urls: list[str]) -> None:
+    try:
+        fallback = await _post(
+            client,
+            f"{base_url}/sendMessage",
+            {"chat_id": chat_id, "text": "\n".join(f"Фото: {url}" for url in urls)},
+        )
+    except httpx.HTTPError as e:
+        print("TELEGRAM_FALLBACK_FAILED:", redact(repr(e)))
+        return
+    if fallback.status_code >= 400:
+        print("TELEGRAM_FALLBACK_FAILED:", fallback.status_code, fallback.text)
+
+
+async def _send_photos(client, base_url: str, chat_id: str, urls: list[str]) -> None:
+    """Одна пачка фото; ошибки не поднимает — при неудаче отправляет ссылки."""
+    try:
+        if len(urls) == 1:
+            resp = await _post(client, f"{base_url}/sendPhoto", {"chat_id": chat_id, "photo": urls[0]})
+        else:
+            media = [{"type": "photo", "media": url} for url in urls]
+            resp = await _post(
+                client, f"{base_url}/sendMediaGroup", {"chat_id": chat_id, "media": json.dumps(media)}
+            )
+    except httpx.HTTPError as e:
+        print("TELEGRAM_SENDPHOTO_FAILED:", redact(repr(e)))
+        await _send_photo_links(client, base_url, chat_id, urls)
+        return
+
+    if resp.status_code >= 400:
+        print("TELEGRAM_SENDPHOTO_FAILED:", resp.status_code, resp.text)
+        await _send_photo_links(client, base_url, chat_id, urls)
+
+
+async def adeliver_order(order: Order, items: list[OrderItem], client=None) -> None:
+    """
+    Async-аналог deliver_order: статус заказа не меняет, при ошибке текста —
+    TelegramError; после принятого текста ошибки фото не поднимаются.
+    """
+    token, chat_id = _get_config()
+    base_url = f"{TELEGRAM_API_URL}/bot{token}"
+    message = _build_message(order, items)
+
+    own_client = client is None
+    if own_client:
+        client = make_client()
+    try:
+        try:
+            resp = await _post(
+                client,
+                f"{base_url}/sendMessage",
+                {"chat_id": chat_id, "text": message, "parse_mode": "HTML"},
+            )
+        except httpx.HTTPError as e:
+            raise TelegramError(redact(f"request exception: {e!r}")) from e
+        if resp.status_code >= 400:
+            raise TelegramError(f"sendMessage failed: {resp.status_code} {resp.text}")
+
+        # По очереди: параллельные пачки приходят в чат в произвольном порядке
+        for chunk in _chunked(_unique_photo_urls(items), MEDIA_GROUP_LIMIT):
+            await _send_photos(client, base_url, chat_id, chunk)
+    finally:
+        if own_client:
+            await client.aclose()
+
+
+async def asend_order_to_telegram(order: Order) -> None:
+    """Async-аналог send_order_to_telegram: отправляет и обновляет Order.status."""
+    items = [item async for item in order.items.all()]
+    try:
+        await adeliver_order(order, items)
+    except TelegramConfigError as e:
+        print("TELEGRAM_CONFIG_MISSING:", e)
+        order.status = Order.STATUS_FAILED
+    except TelegramError as e:
+        print("TELEGRAM_SEND_FAILED:", e)
+        order.status = Order.STATUS_FAILED
+    else:
+        order.status = Order.STATUS_SENT
+    await order.asave(update_fields=["status"])
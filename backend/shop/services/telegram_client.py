@@ -0,0 +1,199 @@
+"""
+Общий HTTP-клиент для Telegram Bot API.
+
+Один requests.Session с пулом keep-alive соединений на процесс, token bucket
+на каждый chat_id и повтор запроса после 429 с учётом retry_after.
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+from .. import metrics
+
+REQUEST_TIMEOUT = 15
+POOL_MAXSIZE = 10
+# Telegram: не больше ~1 сообщения в секунду в один чат, короткие всплески допустимы
+CHAT_RATE_PER_SEC = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))
+CHAT_BURST = int(os.getenv("TELEGRAM_CHAT_BURST", "3"))
+MAX_429_RETRIES = 3
+MAX_RETRY_AFTER_SECONDS = 60
+
+
+class ConnectionStats:
+    """Счётчики запросов и реально открытых (TCP+TLS) соединений."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections_opened = 0
+        self.rate_limited = 0
+
+    def incr(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    @property
+    def connections_reused(self) -> int:
+        return max(self.requests - self.connections_opened, 0)
+
+    def as_dict(self) -> dict[str, int]:
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "connections_reused": self.connections_reused,
+            "rate_limited": self.rate_limited,
+        }
+
+
+stats = ConnectionStats()
+
+
+class _CountingHTTPConnection(HTTPConnection):
+    def connect(self) -> None:
+        stats.incr("connections_opened")
+        super().connect()
+
+
+class _CountingHTTPSConnection(HTTPSConnection):
+    def connect(self) -> None:
+        stats.incr("connections_opened")
+        super().connect()
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CountingHTTPConnection
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CountingHTTPSConnection
+
+
+class _CountingAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        stats.incr("requests")
+        return super().send(request, **kwargs)
+
+
+class TokenBucket:
+    """Простой потокобезопасный token bucket: rate токенов в секунду, не больше capacity."""
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self) -> float:
+        """Берёт токен и возвращает 0 или сколько секунд подождать до следующей попытки."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self) -> None:
+        while wait := self._take():
+            time.sleep(wait)
+
+    async def aacquire(self) -> None:
+        """То же для event loop: ждёт через asyncio.sleep, не блокируя поток."""
+        while wait := self._take():
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """После 429 обнуляет запас токенов на указанное время."""
+        with self._lock:
+            self._tokens = -seconds * self.rate
+            self._updated = time.monotonic()
+
+
+def _retry_after(resp: requests.Response) -> float:
+    try:
+        value = resp.json().get("parameters", {}).get("retry_after")
+    except ValueError:
+        value = None
+    if value is None:
+        value = resp.headers.get("Retry-After", 1)
+    try:
+        return min(float(value), MAX_RETRY_AFTER_SECONDS)
+    except (TypeError, ValueError):
+        return 1.0
+
+
+class TelegramClient:
+    def __init__(self) -> None:
+        self.session = requests.Session()
+        # Повторяем только ошибки соединения: запрос ещё не ушёл, дубля не будет
+        retry = Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.5, raise_on_status=False)
+        adapter = _CountingAdapter(pool_connections=2, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._buckets: dict[str, TokenBucket] = {}
+        self._buckets_lock = threading.Lock()
+
+    def _bucket(self, chat_id: str) -> TokenBucket:
+        with self._buckets_lock:
+            bucket = self._buckets.get(chat_id)
+            if bucket is None:
+                bucket = self._buckets[chat_id] = TokenBucket(CHAT_RATE_PER_SEC, CHAT_BURST)
+            return bucket
+
+    def post(self, url: str, data: dict, chat_id: str) -> requests.Response:
+        bucket = self._bucket(chat_id)
+        for attempt in range(MAX_429_RETRIES + 1):
+            bucket.acquire()
+            start = time.perf_counter()
+            try:
+                resp = self.session.post(url, data=data, timeout=REQUEST_TIMEOUT)
+            except requests.RequestException:
+                metrics.observe_telegram(url, "error", time.perf_counter() - start)
+                raise
+            metrics.observe_telegram(url, resp.status_code, time.perf_counter() - start)
+            if resp.status_code != 429 or attempt == MAX_429_RETRIES:
+                return resp
+            stats.incr("rate_limited")
+            delay = _retry_after(resp)
+            print("TELEGRAM_RATE_LIMITED: retry after", delay)
+            bucket.pause(delay)
+        return resp
+
+
+_client: TelegramClient | None = None
+_client_pid: int | None = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> TelegramClient:
+    """Клиент создаётся лениво, отдельно в каждом процессе (после fork пул не наследуется)."""
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                _client = TelegramClient()
+                _client_pid = pid
+    return _client
+
+
+def chat_bucket(chat_id: str) -> TokenBucket:
+    """Token bucket чата, общий для requests- и httpx-отправки в этом процессе."""
+    return get_client()._bucket(chat_id)
@@ -0,0 +1,155 @@
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ..models import Order, TelegramOutbox
+from .telegram_service import TelegramConfigError, TelegramError, deliver_order
+
+MAX_ATTEMPTS = 8
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 30 * 60
+# Сколько секунд запись «принадлежит» воркеру, который её взял. Аренда продлевается
+# перед отправкой каждой записи, поэтому должна покрывать одну отправку целиком:
+# текст и до 11 пачек фото, с таймаутами и ожиданием после 429
+CLAIM_LEASE_SECONDS = 600
+
+
+def enqueue_order(order: Order) -> TelegramOutbox:
+    """Ставит заказ в очередь. Вызывать внутри transaction.atomic() вместе с заказом."""
+    return TelegramOutbox.objects.create(order=order)
+
+
+def backoff_delay(attempts: int) -> timedelta:
+    seconds = min(BACKOFF_BASE_SECONDS * (2 ** max(attempts - 1, 0)), BACKOFF_MAX_SECONDS)
+    return timedelta(seconds=seconds)
+
+
+def claim_due(batch_size: int = 10) -> list[TelegramOutbox]:
+    """
+    Забирает созревшие записи и продлевает им next_attempt_at на время lease,
+    чтобы параллельный воркер не отправил тот же заказ второй раз.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        qs = TelegramOutbox.objects.filter(
+            status=TelegramOutbox.STATUS_PENDING,
+            next_attempt_at__lte=now,
+        ).order_by("next_attempt_at")
+        if connection.features.has_select_for_update_skip_locked:
+            qs = qs.select_for_update(skip_locked=True)
+        messages = list(qs[:batch_size])
+        if messages:
+            lease_until = now + timedelta(seconds=CLAIM_LEASE_SECONDS)
+            TelegramOutbox.objects.filter(pk__in=[m.pk for m in messages]).update(next_attempt_at=lease_until)
+            for message in messages:
+                message.next_attempt_at = lease_until
+    return messages
+
+
+def renew_lease(message: TelegramOutbox) -> bool:
+    """
+    Продлевает аренду перед отправкой. False — аренда истекла, и запись уже забрал
+    другой воркер (next_attempt_at не тот, что поставили мы): её нужно пропустить.
+    """
+    lease_until = timezone.now() + timedelta(seconds=CLAIM_LEASE_SECONDS)
+    renewed = TelegramOutbox.objects.filter(
+        pk=message.pk,
+        status=TelegramOutbox.STATUS_PENDING,
+        next_attempt_at=message.next_attempt_at,
+    ).update(next_attempt_at=lease_until)
+    if renewed:
+        message.next_attempt_at = lease_until
+    return bool(renewed)
+
+
+def _record_failure(message: TelegramOutbox, error: TelegramError, max_attempts: int) -> None:
+    permanent = isinstance(error, TelegramConfigError) or message.attempts >= max_attempts
+    message.last_error = str(error)
+    if permanent:
+        message.status = TelegramOutbox.STATUS_FAILED
+        with transaction.atomic():
+            message.save(update_fields=["status", "attempts", "last_error"])
+            Order.objects.filter(pk=message.order_id).update(status=Order.STATUS_FAILED)
+    else:
+        message.next_attempt_at = timezone.now() + backoff_delay(message.attempts)
+        message.save(update_fields=["attempts", "last_error", "next_attempt_at"])
+    print("TELEGRAM_OUTBOX_FAILED:", message.order_id, message.attempts, error)
+
+
+def _record_success(message: TelegramOutbox) -> None:
+    message.status = TelegramOutbox.STATUS_DONE
+    message.sent_at = timezone.now()
+    message.last_error = ""
+    with transaction.atomic():
+        message.save(update_fields=["status", "attempts", "sent_at", "last_error"])
+        Order.objects.filter(pk=message.order_id).update(status=Order.STATUS_SENT)
+
+
+def process_message(message: TelegramOutbox, max_attempts: int = MAX_ATTEMPTS) -> bool:
+    """Отправляет одну запись очереди. Возвращает True, если заказ доставлен."""
+    if not renew_lease(message):
+        return False
+    order = Order.objects.prefetch_related("items").get(pk=message.order_id)
+    message.attempts += 1
+
+    try:
+        deliver_order(order, list(order.items.all()))
+    except TelegramError as e:
+        _record_failure(message, e, max_attempts)
+        return False
+
+    _record_success(message)
+    return True
+
+
+def drain(batch_size: int = 10, max_attempts: int = MAX_ATTEMPTS) -> int:
+    """Обрабатывает все созревшие записи. Возвращает количество обработанных."""
+    processed = 0
+    while True:
+        messages = claim_due(batch_size)
+        if not messages:
+            return processed
+        for message in messages:
+            process_message(message, max_attempts=max_attempts)
+            processed += 1
+
+
+async def aprocess_message(message: TelegramOutbox, client, max_attempts: int = MAX_ATTEMPTS) -> bool:
+    from .telegram_async import adeliver_order
+
+    if not await sync_to_async(renew_lease)(message):
+        return False
+    order = await Order.objects.aget(pk=message.order_id)
+    items = [item async for item in order.items.all()]
+    message.attempts += 1
+
+    try:
+        await adeliver_order(order, items, client=client)
+    except TelegramError as e:
+        await sync_to_async(_record_failure)(message, e, max_attempts)
+        return False
+
+    await sync_to_async(_record_success)(message)
+    return True
+
+
+async def adrain(batch_size: int = 10, max_attempts: int = MAX_ATTEMPTS) -> int:
+    """
+    Как drain(), но через httpx.AsyncClient. Заказы отправляются по одному:
+    все они идут в один чат (TELEGRAM_CHAT_ID), и при параллельной отправке
+    текст и фото разных заказов перемешались бы.
+    """
+    # httpx импортируется только здесь: веб-воркерам он не нужен, а стоит ~0.1 с на старте
+    from .telegram_async import make_client
+
+    processed = 0
+    async with make_client() as client:
+        while True:
+            messages = await sync_to_async(claim_due)(batch_size)
+            if not messages:
+                return processed
+            for message in messages:
+                await aprocess_message(message, client, max_attempts=max_attempts)
+                processed += 1
@@ -1,20 +1,26 @@
+import json
 import os
+import re
 from datetime import datetime
 
 import requests
+from django.conf import settings
 from django.utils import timezone
 
-from ..models import Order
+from ..images import TELEGRAM_THUMBNAIL_SIZE
+from ..models import Order, OrderItem
+from . import thumbnails
+from .telegram_client import get_client
 
 
 def _format_datetime(value: datetime) -> str:
     return timezone.localtime(value).strftime("%d.%m.%Y %H:%M")
 
 
-def _build_message(order: Order) -> str:
+def _build_message(order: Order, items: list[OrderItem]) -> str:
     comment = order.customer_comment.strip() if order.customer_comment else "-"
     items_lines = []
-    for idx, item in enumerate(order.items.all(), start=1):
+    for idx, item in enumerate(items, start=1):
         line_total = item.price_snapshot_uzs * item.qty
         items_lines.append(
             "\n".join(
@@ -64,53 +70,150 @@ def _build_message(order: Order) -> str:
     )
 
 
-def send_order_to_telegram(order: Order) -> None:
-    token = (os.getenv("TELEGRAM_BOT_TOKEN") or "").strip()
-    chat_id = (os.getenv("TELEGRAM_CHAT_ID") or "").strip()
+# Переопределяется для локальной заглушки (manage.py bench_load)
+TELEGRAM_API_URL = (os.getenv("TELEGRAM_API_URL") or "https://api.telegram.org").rstrip("/")
 
-    if not token or not chat_id:
-        print("TELEGRAM_CONFIG_MISSING: TELEGRAM_BOT_TOKEN or TELEGRAM_CHAT_ID is empty")
-        order.status = Order.STATUS_FAILED
-        order.save(update_fields=["status"])
-        return
+# Telegram принимает в sendMediaGroup от 2 до 10 элементов
+MEDIA_GROUP_LIMIT = 10
+
+
+def _photo_url(url: str) -> str:
+    """
+    С PUBLIC_BASE_URL Telegram получает JPEG-превью с нашего сервера:
+    оно меньше оригинала и не упирается в лимит Telegram на размер фото.
+    """
+    base = getattr(settings, "PUBLIC_BASE_URL", "")
+    thumbnail = thumbnails.thumbnail_url([url], TELEGRAM_THUMBNAIL_SIZE, "jpg") if base else None
+    return f"{base}{thumbnail}" if thumbnail else url
+
+
+def _unique_photo_urls(items) -> list[str]:
+    """Фото товаров без повторов (порядок сохраняется)."""
+    seen: set[str] = set()
+    out: list[str] = []
+    for item in items:
+        url = item.image_url_snapshot
+        if url and url not in seen:
+            seen.add(url)
+            out.append(_photo_url(url))
+    return out
+
+
+def _chunked(values: list[str], size: int) -> list[list[str]]:
+    return [values[i : i + size] for i in range(0, len(values), size)]
 
-    base_url = f"https://api.telegram.org/bot{token}"
-    message = _build_message(order)
 
+def _send_photo_links(base_url: str, chat_id: str, urls: list[str]) -> None:
+    """Запасной вариант для пачки фото — ссылки одним сообщением."""
     try:
-        resp = requests.post(
+        fallback = get_client().post(
             f"{base_url}/sendMessage",
-            data={"chat_id": chat_id, "text": message, "parse_mode": "HTML"},
-            timeout=15,
+            data={"chat_id": chat_id, "text": "\n".join(f"Фото: {url}" for url in urls)},
+            chat_id=chat_id,
         )
+    except requests.RequestException as e:
+        print("TELEGRAM_FALLBACK_FAILED:", redact(repr(e)))
+        return
+    if not fallback.ok:
+        print("TELEGRAM_FALLBACK_FAILED:", fallback.status_code, fallback.text)
 
-        if not resp.ok:
-            print("TELEGRAM_SENDMESSAGE_FAILED:", resp.status_code, resp.text)
-            order.status = Order.STATUS_FAILED
-            order.save(update_fields=["status"])
-            return
 
-        for item in order.items.all():
-            photo_resp = requests.post(
+def _send_photos(base_url: str, chat_id: str, urls: list[str]) -> None:
+    """
+    Одна пачка фото: sendPhoto для одного, sendMediaGroup для 2–10.
+    Ошибки не поднимает: при неудаче отправляет ссылки.
+    """
+    try:
+        if len(urls) == 1:
+            resp = get_client().post(
                 f"{base_url}/sendPhoto",
-                data={"chat_id": chat_id, "photo": item.image_url_snapshot},
-                timeout=15,
+                data={"chat_id": chat_id, "photo": urls[0]},
+                chat_id=chat_id,
+            )
+        else:
+            media = [{"type": "photo", "media": url} for url in urls]
+            resp = get_client().post(
+                f"{base_url}/sendMediaGroup",
+                data={"chat_id": chat_id, "media": json.dumps(media)},
+                chat_id=chat_id,
             )
-            if not photo_resp.ok:
-                print("TELEGRAM_SENDPHOTO_FAILED:", photo_resp.status_code, photo_resp.text)
-                # fallback: send link
-                fallback = requests.post(
-                    f"{base_url}/sendMessage",
-                    data={"chat_id": chat_id, "text": f"Фото: {item.image_url_snapshot}"},
-                    timeout=15,
-                )
-                if not fallback.ok:
-                    print("TELEGRAM_FALLBACK_FAILED:", fallback.status_code, fallback.text)
+    except requests.RequestException as e:
+        print("TELEGRAM_SENDPHOTO_FAILED:", redact(repr(e)))
+        _send_photo_links(base_url, chat_id, urls)
+        return
 
-        order.status = Order.STATUS_SENT
-        order.save(update_fields=["status"])
+    if not resp.ok:
+        print("TELEGRAM_SENDPHOTO_FAILED:", resp.status_code, resp.text)
+        # fallback: send links for the whole chunk
+        _send_photo_links(base_url, chat_id, urls)
+
+
+_TOKEN_IN_URL = re.compile(r"/bot[^/\s'\"]+")
+
+
+def redact(text: str) -> str:
+    """Убирает токен бота из URL в тексте ошибки (last_error видно в админке)."""
+    return _TOKEN_IN_URL.sub("/bot<token>", text)
 
+
+class TelegramError(Exception):
+    """Не удалось доставить уведомление; можно повторить позже."""
+
+
+class TelegramConfigError(TelegramError):
+    """Бот не настроен — повторять отправку бессмысленно."""
+
+
+def _get_config() -> tuple[str, str]:
+    token = (os.getenv("TELEGRAM_BOT_TOKEN") or "").strip()
+    chat_id = (os.getenv("TELEGRAM_CHAT_ID") or "").strip()
+    if not token or not chat_id:
+        raise TelegramConfigError("TELEGRAM_BOT_TOKEN or TELEGRAM_CHAT_ID is empty")
+    return token, chat_id
+
+
+def deliver_order(order: Order, items: list[OrderItem] | None = None) -> None:
+    """
+    Отправляет заказ в Telegram. Статус заказа не меняет —
+    при ошибке поднимает TelegramError.
+    Позиции можно передать готовым списком, иначе они загружаются одним запросом.
+
+    Заказ считается доставленным, как только принят текст: ошибка на фото
+    не поднимается, иначе повтор из очереди отправил бы текст ещё раз.
+    """
+    token, chat_id = _get_config()
+    if items is None:
+        items = list(order.items.all())
+    base_url = f"{TELEGRAM_API_URL}/bot{token}"
+    message = _build_message(order, items)
+
+    try:
+        resp = get_client().post(
+            f"{base_url}/sendMessage",
+            data={"chat_id": chat_id, "text": message, "parse_mode": "HTML"},
+            chat_id=chat_id,
+        )
     except requests.RequestException as e:
-        print("TELEGRAM_REQUEST_EXCEPTION:", repr(e))
+        raise TelegramError(redact(f"request exception: {e!r}")) from e
+
+    if not resp.ok:
+        raise TelegramError(f"sendMessage failed: {resp.status_code} {resp.text}")
+
+    photos = _unique_photo_urls(items)
+    for chunk in _chunked(photos, MEDIA_GROUP_LIMIT):
+        _send_photos(base_url, chat_id, chunk)
+
+
+def send_order_to_telegram(order: Order) -> None:
+    """Синхронная отправка с обновлением Order.status (используется в telegram_test)."""
+    try:
+        deliver_order(order)
+    except TelegramConfigError as e:
+        print("TELEGRAM_CONFIG_MISSING:", e)
+        order.status = Order.STATUS_FAILED
+    except TelegramError as e:
+        print("TELEGRAM_SEND_FAILED:", e)
         order.status = Order.STATUS_FAILED
-        order.save(update_fields=["status"])
+    else:
+        order.status = Order.STATUS_SENT
+    order.save(update_fields=["status"])
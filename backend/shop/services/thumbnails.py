@@ -0,0 +1,282 @@
+"""
+Превью фото товаров: оригинал скачивается один раз, варианты нужного размера
+считаются Pillow в пуле потоков и лежат на диске в IMAGE_CACHE_DIR:
+
+    originals/<hash>              — исходный файл
+    variants/<hash>/<w>x<h>.<fmt> — превью
+
+<hash> — image_hash() ссылки из Product.image_urls; другие ссылки не обслуживаются,
+поэтому это не открытый прокси. При превышении IMAGE_CACHE_MAX_MB удаляются
+давно не запрошенные файлы (LRU по mtime, который обновляется при каждом чтении).
+"""
+
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from io import BytesIO
+from pathlib import Path
+
+import requests
+from django.conf import settings
+
+from ..images import CATALOG_THUMBNAIL_SIZE, THUMBNAIL_FORMATS, image_hash, thumbnail_path
+from ..models import Product
+from . import catalog_cache
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - Pillow нужен только для превью
+    Image = None
+
+FETCH_TIMEOUT = 15
+MAX_ORIGINAL_BYTES = 15 * 1024 * 1024
+EVICT_INTERVAL_SECONDS = 30
+# Промах по индексу перечитывает ссылки из БД не чаще раза в столько секунд
+INDEX_REFRESH_SECONDS = 5
+DIGEST_RE = re.compile(r"[0-9a-f]{32}")
+QUALITY = {"webp": 80, "jpg": 85}
+
+
+class ThumbnailError(Exception):
+    def __init__(self, message: str, status: int) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def enabled() -> bool:
+    return Image is not None and getattr(settings, "IMAGE_THUMBNAILS", True)
+
+
+def thumbnail_url(image_urls, size: str = CATALOG_THUMBNAIL_SIZE, fmt: str = "webp") -> str | None:
+    """Относительный адрес превью первого фото; None, если превью выключены или фото нет."""
+    if not enabled() or not image_urls or not isinstance(image_urls[0], str):
+        return None
+    return thumbnail_path(image_urls[0], size, fmt)
+
+
+def _cache_dir() -> Path:
+    return Path(settings.IMAGE_CACHE_DIR)
+
+
+def _variant_file(digest: str, size: str, fmt: str) -> Path:
+    return _cache_dir() / "variants" / digest / f"{size}.{fmt}"
+
+
+def parse_size(size: str) -> tuple[int, int]:
+    if size not in settings.THUMBNAIL_SIZES:
+        raise ThumbnailError(f"Size must be one of: {', '.join(settings.THUMBNAIL_SIZES)}.", 400)
+    width, height = size.split("x")
+    return int(width), int(height)
+
+
+# --- ссылки товаров по хэшу ---------------------------------------------------
+
+_index: dict[str, str] = {}
+_index_version: int | None = None
+_index_built_at = 0.0
+_index_lock = threading.Lock()
+
+
+def _build_index() -> dict[str, str]:
+    index = {}
+    for urls in Product.objects.values_list("image_urls", flat=True):
+        for url in urls or []:
+            if isinstance(url, str):
+                index[image_hash(url)] = url
+    return index
+
+
+def resolve_url(digest: str) -> str | None:
+    """
+    Ссылка на оригинал по хэшу. Индекс перестраивается при изменении каталога,
+    а при промахе — ещё раз из БД: без Redis версия каталога своя у каждого
+    процесса, и товар, добавленный через другой воркер, иначе отдавал бы 404.
+    """
+    global _index, _index_version, _index_built_at
+    version = catalog_cache.get_version()
+    now = time.monotonic()
+    stale = _index_version != version or (
+        digest not in _index and now - _index_built_at >= INDEX_REFRESH_SECONDS
+    )
+    if stale:
+        index = _build_index()
+        with _index_lock:
+            _index, _index_version, _index_built_at = index, version, now
+    return _index.get(digest)
+
+
+# --- дисковый кэш --------------------------------------------------------------
+
+
+def cached_variant(digest: str, size: str, fmt: str) -> Path | None:
+    """Готовое превью или None; digest должен быть уже проверен check_request()."""
+    path = _variant_file(digest, size, fmt)
+    try:
+        os.utime(path)  # отметка для LRU
+    except FileNotFoundError:
+        return None
+    return path
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    # Через временный файл: параллельный читатель не увидит недописанный файл
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+_last_evict = 0.0
+_evict_lock = threading.Lock()
+
+
+def evict(max_bytes: int | None = None) -> int:
+    """Удаляет самые старые по mtime файлы, пока кэш больше лимита. Возвращает число удалённых."""
+    if max_bytes is None:
+        max_bytes = settings.IMAGE_CACHE_MAX_MB * 1024 * 1024
+    files = []
+    total = 0
+    for root, _dirs, names in os.walk(_cache_dir()):
+        for name in names:
+            path = Path(root) / name
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+    removed = 0
+    for _mtime, file_size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= file_size
+        removed += 1
+    return removed
+
+
+def _maybe_evict() -> None:
+    global _last_evict
+    if time.monotonic() - _last_evict < EVICT_INTERVAL_SECONDS or not _evict_lock.acquire(blocking=False):
+        return
+    try:
+        _last_evict = time.monotonic()
+        evict()
+    finally:
+        _evict_lock.release()
+
+
+# --- загрузка и ресайз (в пуле потоков) ----------------------------------------
+
+# Блокировка на превью и число потоков, которые её держат или ждут;
+# запись удаляется, когда уходит последний, так что словарь не растёт
+_key_locks: dict[str, tuple[threading.Lock, int]] = {}
+_key_locks_lock = threading.Lock()
+
+
+@contextmanager
+def _key_lock(key: str):
+    with _key_locks_lock:
+        lock, users = _key_locks.get(key) or (threading.Lock(), 0)
+        _key_locks[key] = (lock, users + 1)
+    try:
+        with lock:
+            yield
+    finally:
+        with _key_locks_lock:
+            lock, users = _key_locks[key]
+            if users == 1:
+                del _key_locks[key]
+            else:
+                _key_locks[key] = (lock, users - 1)
+
+
+def _fetch_original(url: str, digest: str) -> bytes:
+    path = _cache_dir() / "originals" / digest
+    if path.exists():
+        os.utime(path)
+        return path.read_bytes()
+
+    try:
+        with requests.get(url, timeout=FETCH_TIMEOUT, stream=True) as resp:
+            resp.raise_for_status()
+            if not resp.headers.get("Content-Type", "").startswith("image/"):
+                raise ThumbnailError("Original is not an image.", 502)
+            data = BytesIO()
+            for chunk in resp.iter_content(64 * 1024):
+                data.write(chunk)
+                if data.tell() > MAX_ORIGINAL_BYTES:
+                    raise ThumbnailError("Original image is too large.", 502)
+    except requests.RequestException as e:
+        raise ThumbnailError(f"Could not fetch original: {e}", 502) from e
+
+    _write_atomic(path, data.getvalue())
+    return data.getvalue()
+
+
+def render_variant(url: str, digest: str, size: str, fmt: str) -> Path:
+    """Блокирующая часть: скачать оригинал (если его нет), ужать, записать. Вызывается в пуле."""
+    width, height = parse_size(size)
+    path = _variant_file(digest, size, fmt)
+    # Одновременные запросы одного превью в процессе ждут первый, а не считают его заново
+    with _key_lock(f"{digest}/{size}.{fmt}"):
+        if path.exists():
+            return path
+        original = _fetch_original(url, digest)
+        try:
+            image = ImageOps.exif_transpose(Image.open(BytesIO(original)))
+            image.thumbnail((width, height), Image.LANCZOS)
+            if fmt == "jpg" and image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            out = BytesIO()
+            image.save(out, "JPEG" if fmt == "jpg" else "WEBP", quality=QUALITY[fmt], optimize=True)
+        except (OSError, Image.DecompressionBombError) as e:
+            raise ThumbnailError(f"Could not decode original: {e}", 502) from e
+        _write_atomic(path, out.getvalue())
+    _maybe_evict()
+    return path
+
+
+_pool: ThreadPoolExecutor | None = None
+_pool_pid: int | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ThreadPoolExecutor:
+    """Пул на процесс: ресайз грузит CPU, число потоков ограничено IMAGE_WORKERS."""
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                _pool = ThreadPoolExecutor(max_workers=settings.IMAGE_WORKERS, thread_name_prefix="thumbnails")
+                _pool_pid = pid
+    return _pool
+
+
+def check_request(digest: str, size: str, fmt: str) -> None:
+    if not enabled():
+        raise ThumbnailError("Image thumbnails are disabled (Pillow is not installed).", 503)
+    # digest входит в путь файла в кэше — только 32 hex-символа image_hash()
+    if not DIGEST_RE.fullmatch(digest):
+        raise ThumbnailError("Unknown image.", 404)
+    if fmt not in THUMBNAIL_FORMATS:
+        raise ThumbnailError(f"Format must be one of: {', '.join(THUMBNAIL_FORMATS)}.", 400)
+    parse_size(size)
+
+
+def get_variant(digest: str, size: str, fmt: str) -> Path:
+    check_request(digest, size, fmt)
+    path = cached_variant(digest, size, fmt)
+    if path is not None:
+        return path
+    url = resolve_url(digest)
+    if url is None:
+        raise ThumbnailError("Unknown image.", 404)
+    return get_pool().submit(render_variant, url, digest, size, fmt).result()
+
@@ -0,0 +1,61 @@
+"""
+Размеры колец. Канонический вид — целые десятые доли (15.5 -> 155):
+их хранит ProductSize, по ним же идёт проверка при заказе.
+"""
+
+from decimal import Decimal, InvalidOperation
+from typing import Any
+
+from django.core.exceptions import ValidationError
+
+DECIMAL_SIZE_QUANT = Decimal("0.1")  # 15.5 -> 15.5 (1 знак после точки)
+MAX_SIZE_TENTHS = 9999  # OrderItem.selected_size: max_digits=4, decimal_places=1
+
+
+def parse_size(value: Any) -> Decimal:
+    """
+    Приводит размер к Decimal с 1 знаком после точки.
+    Принимает: 15, 15.5, "15.5", "15,5"
+    """
+    if value is None:
+        raise ValidationError("Размер обязателен.")
+
+    s = str(value).strip().replace(",", ".")
+    try:
+        d = Decimal(s).quantize(DECIMAL_SIZE_QUANT)
+    except (InvalidOperation, ValueError):
+        raise ValidationError("Введите правильное число для размера.")
+    if d <= 0:
+        raise ValidationError("Размер должен быть больше 0.")
+    return d
+
+
+def size_to_tenths(size: Decimal) -> int:
+    return int(size * 10)
+
+
+def tenths_to_size(tenths: int) -> Decimal:
+    return (Decimal(tenths) / 10).quantize(DECIMAL_SIZE_QUANT)
+
+
+def normalize_sizes(sizes: Any) -> list[int]:
+    """
+    Строгая проверка Product.sizes: список, все значения — корректные размеры.
+    Возвращает отсортированные уникальные десятые доли.
+    """
+    if not isinstance(sizes, list):
+        raise ValidationError("Размеры должны быть списком.")
+    out: set[int] = set()
+    for value in sizes:
+        try:
+            tenths = size_to_tenths(parse_size(value))
+        except ValidationError:
+            raise ValidationError(f"Неверный размер: {value!r}.")
+        if tenths > MAX_SIZE_TENTHS:
+            raise ValidationError(f"Неверный размер: {value!r}.")
+        out.add(tenths)
+    return sorted(out)
+
+
+def validate_sizes(sizes: Any) -> None:
+    normalize_sizes(sizes)
@@ -0,0 +1,350 @@
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from unittest import skipUnless
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+
+from .fast_serializers import product_values, render_json, serialize_product_rows
+from .models import Order, OrderItem, Product, ProductSize, TelegramOutbox
+from .serializers import OrderCreateSerializer, ProductListSerializer, orderable_products
+
+# Товары с позициями (slug__in), размеры (prefetch), savepoint, заказ,
+# позиции одним bulk_create, запись outbox, release savepoint
+ORDER_CREATE_QUERIES = 7
+
+
+class OrderCreateQueryCountTests(TestCase):
+    """Число запросов POST /api/orders/ не зависит от количества позиций."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(50):
+            Product.objects.create(
+                slug=f"ring-{i}",
+                title=f"Ring {i}",
+                description="Silver ring",
+                price_uzs=100_000 + i,
+                sizes=["16", "16.5"],
+                image_urls=[f"https://example.com/ring-{i}.jpg"],
+            )
+
+    def _post_order(self, item_count: int):
+        payload = {
+            "customer": {"name": "Test", "phone": "+998901234567", "address": "Tashkent"},
+            "items": [
+                {"productSlug": f"ring-{i}", "qty": 1, "selectedSize": 16.5} for i in range(item_count)
+            ],
+            "meta": {"locale": "ru", "theme": "light"},
+        }
+        return self.client.post("/api/orders/", payload, content_type="application/json")
+
+    def test_two_items(self):
+        with self.assertNumQueries(ORDER_CREATE_QUERIES):
+            response = self._post_order(2)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(OrderItem.objects.count(), 2)
+
+    def test_fifty_items(self):
+        with self.assertNumQueries(ORDER_CREATE_QUERIES):
+            response = self._post_order(50)
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get()
+        self.assertEqual(order.items.count(), 50)
+        self.assertEqual(order.subtotal_uzs, sum(100_000 + i for i in range(50)))
+        self.assertEqual(TelegramOutbox.objects.filter(order=order).count(), 1)
+
+
+class OrderExportTests(TestCase):
+    """GET /api/orders/export: одинаковый CSV под WSGI и ASGI, формулы не исполняются."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user("export-staff", password="pass", is_staff=True)
+        product = Product.objects.create(
+            slug="export-ring",
+            title="Ring",
+            description="Silver ring",
+            price_uzs=1000,
+            sizes=["16"],
+            image_urls=["https://example.com/ring.jpg"],
+        )
+        order = Order.objects.create(
+            customer_name='=HYPERLINK("https://example.com")',
+            customer_phone="+998901234567",
+            customer_address="Tashkent",
+            subtotal_uzs=1000,
+        )
+        OrderItem.objects.create(
+            order=order,
+            product=product,
+            title_snapshot="Ring",
+            description_snapshot="Silver ring",
+            price_snapshot_uzs=1000,
+            image_url_snapshot="https://example.com/ring.jpg",
+            qty=1,
+            selected_size="16.0",
+        )
+
+    def _wsgi_csv(self) -> bytes:
+        self.client.force_login(self.staff)
+        response = self.client.get("/api/orders/export?format=csv")
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content)
+
+    def test_formulas_are_escaped(self):
+        rows = self._wsgi_csv().decode().splitlines()
+        self.assertEqual(len(rows), 2)
+        self.assertIn(""""'=HYPERLINK(""https://example.com"")",'+998901234567,Tashkent,""", rows[1])
+
+    async def test_asgi_matches_wsgi(self):
+        await self.async_client.aforce_login(self.staff)
+        response = await self.async_client.get("/api/orders/export?format=csv")
+        self.assertEqual(response.status_code, 200)
+        # Под ASGI выгрузка идёт через aiterator(), а не собирается в список
+        self.assertTrue(response.is_async)
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(body, await sync_to_async(self._wsgi_csv)())
+
+
+@skipUnless(
+    connection.vendor == "postgresql",
+    "нужны параллельные писатели: SQLite блокирует базу целиком, и конкурентные "
+    "заказы падают с 'database is locked' вместо ожидания блокировки строки",
+)
+class StockReservationRaceTests(TransactionTestCase):
+    """
+    Параллельные заказы на последние единицы размера: успешных ровно столько,
+    сколько было на остатке, и ни одной ошибки БД (блокировки строк без deadlock).
+    """
+
+    CHECKOUTS = 16
+
+    def _race(self, stock: int) -> tuple[dict[str, int], Product]:
+        product = Product.objects.create(
+            slug=f"race-{stock}",
+            title="Race",
+            description="Silver ring",
+            price_uzs=1000,
+            sizes=["16"],
+            image_urls=["https://example.com/race.jpg"],
+        )
+        ProductSize.objects.filter(product=product).update(stock_qty=stock)
+
+        payload = {
+            "customer": {"name": "Test", "phone": "+998901234567", "address": "Tashkent"},
+            "items": [{"productSlug": product.slug, "qty": 1, "selectedSize": 16}],
+            "meta": {"locale": "ru", "theme": "light"},
+        }
+        barrier = threading.Barrier(self.CHECKOUTS)
+        counts = {"won": 0, "out_of_stock": 0}
+        lock = threading.Lock()
+
+        def checkout(_):
+            try:
+                serializer = OrderCreateSerializer(data=payload)
+                serializer.is_valid(raise_exception=True)
+                barrier.wait()
+                try:
+                    serializer.save()
+                    outcome = "won"
+                except ValidationError:
+                    outcome = "out_of_stock"
+                with lock:
+                    counts[outcome] += 1
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=self.CHECKOUTS) as pool:
+            list(pool.map(checkout, range(self.CHECKOUTS)))
+        product.refresh_from_db()
+        return counts, product
+
+    def _assert_sold_out(self, stock: int) -> None:
+        counts, product = self._race(stock)
+        self.assertEqual(counts, {"won": stock, "out_of_stock": self.CHECKOUTS - stock})
+        self.assertEqual(ProductSize.objects.get(product=product).stock_qty, 0)
+        self.assertEqual(Order.objects.filter(items__product=product).count(), stock)
+        self.assertFalse(product.in_stock)
+
+    def test_last_unit(self):
+        self._assert_sold_out(1)
+
+    def test_last_three_units(self):
+        self._assert_sold_out(3)
+
+
+class ProductAdminSizeTests(TestCase):
+    """Размер, убранный из sizes, не возвращается строкой остатка из той же формы."""
+
+    def test_removed_size_with_edited_stock(self):
+        admin_user = User.objects.create_superuser("size-admin", "size-admin@example.com", "pass")
+        self.client.force_login(admin_user)
+        product = Product.objects.create(
+            slug="admin-ring",
+            title="Ring",
+            description="Silver ring",
+            price_uzs=1000,
+            sizes=["15", "16"],
+            image_urls=["https://example.com/ring.jpg"],
+        )
+        rows = list(ProductSize.objects.filter(product=product))
+        data = {
+            "title": product.title,
+            "slug": product.slug,
+            "description": product.description,
+            "price_uzs": product.price_uzs,
+            "currency": product.currency,
+            "sizes": '["15"]',
+            "in_stock": "on",
+            "image_urls": '["https://example.com/ring.jpg"]',
+            "size_options-TOTAL_FORMS": len(rows),
+            "size_options-INITIAL_FORMS": len(rows),
+            "size_options-MIN_NUM_FORMS": 0,
+            "size_options-MAX_NUM_FORMS": 1000,
+        }
+        for i, row in enumerate(rows):
+            data[f"size_options-{i}-id"] = row.pk
+            data[f"size_options-{i}-product"] = product.pk
+            data[f"size_options-{i}-stock_qty"] = 5
+
+        response = self.client.post(f"/admin/shop/product/{product.pk}/change/", data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            list(ProductSize.objects.filter(product=product).values_list("tenths", "stock_qty")),
+            [(150, 5)],
+        )
+
+
+class FastSerializerParityTests(TestCase):
+    """Быстрый путь (.values()) отдаёт те же байты, что ProductListSerializer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Product.objects.create(
+            slug="ring",
+            title="Кольцо «Луна»\u2028",
+            description="Серебро 925 пробы",
+            price_uzs=250_000,
+            sizes=[15, 15.5, "16"],
+            image_urls=["https://example.com/a.jpg", "https://example.com/b.jpg"],
+        )
+        Product.objects.create(
+            slug="earrings",
+            title="Серьги",
+            description="",
+            price_uzs=1,
+            sizes=["17.5"],
+            in_stock=False,
+            image_urls=["https://example.com/c.jpg"],
+        )
+
+    def assertSameJson(self, fields=None):
+        queryset = Product.objects.order_by("-created_at", "id")
+        drf = JSONRenderer().render(ProductListSerializer(queryset, many=True, fields=fields).data)
+        fast = render_json(serialize_product_rows(product_values(queryset, fields), fields))
+        self.assertEqual(fast, drf)
+
+    def test_all_fields(self):
+        self.assertSameJson()
+
+    def test_selected_fields(self):
+        self.assertSameJson(["slug", "price_uzs", "thumbnail_url"])
+        self.assertSameJson(["id", "created_at"])
+
+
+def hot_queries():
+    """(название, queryset, таблица, ожидаемый индекс или None — подойдёт любой)."""
+    return [
+        (
+            "checkout: products by slug",
+            orderable_products([{"productSlug": "a"}, {"productSlug": "b"}]),
+            Product._meta.db_table,
+            None,
+        ),
+        (
+            "catalog page",
+            Product.objects.order_by("-created_at", "id")[:24],
+            Product._meta.db_table,
+            "shop_product_created_id_idx",
+        ),
+        (
+            "catalog page, in stock",
+            Product.objects.filter(in_stock=True).order_by("-created_at", "id")[:24],
+            Product._meta.db_table,
+            "shop_product_instock_idx",
+        ),
+        (
+            "catalog feed: changed since cursor",
+            Product.objects.filter(updated_at__gte=timezone.now()).order_by("updated_at", "id"),
+            Product._meta.db_table,
+            "shop_product_updated_idx",
+        ),
+        (
+            "search: products by size",
+            ProductSize.objects.filter(tenths=165).values("product_id"),
+            ProductSize._meta.db_table,
+            "shop_productsize_tenths_idx",
+        ),
+        (
+            "order.items.all()",
+            OrderItem.objects.filter(order_id=uuid.uuid4()),
+            OrderItem._meta.db_table,
+            None,
+        ),
+        (
+            "admin: orders",
+            Order.objects.order_by("-created_at")[:100],
+            Order._meta.db_table,
+            "shop_order_created_idx",
+        ),
+        (
+            "admin: orders by status",
+            Order.objects.filter(status=Order.STATUS_NEW).order_by("-created_at")[:100],
+            Order._meta.db_table,
+            "shop_order_status_created_idx",
+        ),
+        (
+            "telegram_worker: due messages",
+            TelegramOutbox.objects.filter(
+                status=TelegramOutbox.STATUS_PENDING, next_attempt_at__lte=timezone.now()
+            ).order_by("next_attempt_at")[:10],
+            TelegramOutbox._meta.db_table,
+            "shop_outbox_due_idx",
+        ),
+    ]
+
+
+class HotQueryIndexTests(TestCase):
+    """Горячие запросы (checkout, каталог, админка, outbox) идут по своим индексам."""
+
+    def test_indexes_exist(self):
+        for name, _, table, expected_index in hot_queries():
+            if expected_index is None:
+                continue
+            with self.subTest(name), connection.cursor() as cursor:
+                constraints = connection.introspection.get_constraints(cursor, table)
+                self.assertIn(expected_index, constraints)
+
+    @skipUnless(
+        connection.vendor == "postgresql",
+        "EXPLAIN with enable_seqscan=off is PostgreSQL-only; SQLite plans on empty tables prove nothing",
+    )
+    def test_plans_use_indexes(self):
+        # Без seq scan план не зависит от размера таблиц — проверка работает и на пустой базе
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        for name, queryset, table, expected_index in hot_queries():
+            with self.subTest(name):
+                plan = queryset.explain()
+                self.assertNotIn(f"Seq Scan on {table}", plan)
+                if expected_index:
+                    self.assertIn(expected_index, plan)
+                else:
+                    self.assertRegex(plan, "Index Scan|Index Only Scan|Bitmap Index Scan")
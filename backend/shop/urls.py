@@ -4,8 +4,15 @@ from .health import health_check
 
 urlpatterns = [
     path('products/', views.ProductListView.as_view(), name='product-list'),
+    path('products/search', views.ProductSearchView.as_view(), name='product-search'),
+    path('products/batch', views.ProductBatchView.as_view(), name='product-batch'),
     path('products/<slug:slug>/', views.ProductDetailView.as_view(), name='product-detail'),
     path('orders/', views.OrderCreateView.as_view(), name='order-create'),
+    path('orders/batch', views.OrderBatchView.as_view(), name='order-batch'),
+    path('cart/quote', views.CartQuoteView.as_view(), name='cart-quote'),
+    path('orders/export', views.orders_export, name='order-export'),
+    path('images/<str:digest>/<str:variant>', views.image_thumbnail, name='image-thumbnail'),
     path('health', health_check, name='health-check'),
     path('db-check', views.db_check, name='db-check'),
+    path('metrics', views.metrics_view, name='metrics'),
 ]
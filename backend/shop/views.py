@@ -1,9 +1,40 @@
-from django.http import JsonResponse
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.utils.cache import get_conditional_response
+from django.utils.crypto import constant_time_compare
+from django.utils.http import http_date
 from django.views import View
-from django.db import connection
+from django.db import IntegrityError, connection
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.shortcuts import get_object_or_404
 from rest_framework import generics
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from .models import Product, Order
+from .fast_serializers import product_values, render_json, serialize_product_rows
 from .serializers import ProductListSerializer as ProductSerializer, OrderCreateSerializer as OrderSerializer
+from .pagination import ProductCursorPagination, ProductSearchPagination
+from .search import search_products
+from .sizes import parse_size, size_to_tenths
+from . import metrics
+from .images import THUMBNAIL_FORMATS
+from .services import cart_quote, catalog_cache, catalog_feed, idempotency, order_batch, order_export, thumbnails
+
+def catalog_response(request, entry):
+    """Ответ с закэшированным каталогом: ETag/Last-Modified и 304 на условный GET."""
+    response = HttpResponse(entry.body, content_type="application/json")
+    response["ETag"] = entry.etag
+    response["Last-Modified"] = http_date(entry.last_modified)
+    # Браузер может хранить ответ, но обязан перепроверять его через ETag
+    response["Cache-Control"] = "no-cache"
+    return get_conditional_response(
+        request,
+        etag=entry.etag,
+        last_modified=int(entry.last_modified),
+        response=response,
+    )
 
 class HealthCheckView(View):
     def get(self, request):
@@ -22,15 +53,264 @@ def db_check(request):
         "engine": connection.settings_dict.get("ENGINE"),
     })
 
+def metrics_view(request):
+    """Метрики процесса в формате Prometheus. При METRICS_TOKEN нужен Authorization: Bearer <token>."""
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token and not constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponse(status=401)
+    return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+def export_params(request):
+    """(format, queryset) выгрузки из ?format=&from=&to=&status=; ValueError — ответ 400."""
+    fmt = request.GET.get("format", "csv")
+    if fmt not in order_export.FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(order_export.FORMATS)}.")
+    queryset = order_export.export_queryset(
+        request.GET.get("from"), request.GET.get("to"), request.GET.get("status")
+    )
+    return fmt, queryset
+
+def export_response(request, fmt, content):
+    response = StreamingHttpResponse(content, content_type=order_export.FORMATS[fmt])
+    name = order_export.filename(fmt, request.GET.get("from"), request.GET.get("to"))
+    response["Content-Disposition"] = f'attachment; filename="{name}"'
+    return response
+
+def orders_export(request):
+    """Потоковая выгрузка заказов для сотрудников (вход через сессию админки)."""
+    if not (request.user.is_authenticated and request.user.is_staff):
+        return JsonResponse({"detail": "Staff login required."}, status=403)
+    try:
+        fmt, queryset = export_params(request)
+    except ValueError as e:
+        return JsonResponse({"detail": str(e)}, status=400)
+    # Под ASGI синхронный итератор ответа был бы собран в список целиком
+    iter_export = order_export.aiter_export if isinstance(request, ASGIRequest) else order_export.iter_export
+    return export_response(request, fmt, iter_export(queryset, fmt))
+
+def split_variant(variant):
+    """"640x640.webp" -> ("640x640", "webp")."""
+    size, _, fmt = variant.rpartition(".")
+    return size, fmt
+
+def thumbnail_response(path, fmt):
+    response = FileResponse(path.open("rb"), content_type=THUMBNAIL_FORMATS[fmt])
+    # Адрес превью зависит от ссылки на оригинал и размера — содержимое по нему не меняется
+    response["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
+
+def image_thumbnail(request, digest, variant):
+    """Превью фото товара: /api/images/<hash>/<w>x<h>.<webp|jpg>."""
+    size, fmt = split_variant(variant)
+    try:
+        path = thumbnails.get_variant(digest, size, fmt)
+    except thumbnails.ThumbnailError as e:
+        return JsonResponse({"detail": str(e)}, status=e.status)
+    return thumbnail_response(path, fmt)
+
+def feed_since(params):
+    try:
+        return catalog_feed.decode_cursor(params["since"])
+    except ValueError as e:
+        raise ValidationError({"since": str(e)})
+
 class ProductListView(generics.ListAPIView):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
+    pagination_class = ProductCursorPagination
+
+    def get_fields(self) -> list[str] | None:
+        """?fields=slug,title,price_uzs — только эти поля в ответе и в SELECT."""
+        raw = self.request.query_params.get("fields")
+        if not raw:
+            return None
+        fields = [f.strip() for f in raw.split(",") if f.strip()]
+        unknown = set(fields) - set(ProductSerializer.Meta.fields)
+        if unknown:
+            raise ValidationError({"fields": f"Unknown fields: {', '.join(sorted(unknown))}."})
+        return fields
+
+    def render_catalog(self) -> bytes:
+        rows = product_values(self.get_queryset())
+        return render_json(serialize_product_rows(rows))
+
+    def list(self, request, *args, **kwargs):
+        if "since" in request.query_params:
+            return self.list_feed(feed_since(request.query_params))
+        # Кэшируется только полный каталог; пагинация и ?fields= идут мимо кэша
+        if request.query_params:
+            return self.list_rows()
+
+        return catalog_response(request, catalog_cache.get_catalog(self.render_catalog))
+
+    def list_feed(self, since):
+        variant = catalog_feed.snapshot_variant(since)
+        if variant is None:
+            return Response(catalog_feed.feed(self.get_queryset(), since))
+        # since=0 и reset — полный каталог: кэш и ETag/304, как без ?since=
+        entry = catalog_cache.get_catalog(
+            lambda: render_json(catalog_feed.feed(self.get_queryset(), since)), variant=variant
+        )
+        return catalog_response(self.request, entry)
+
+    def list_rows(self):
+        fields = self.get_fields()
+        # values() выбирает только нужные колонки (плюс id/created_at для курсора)
+        rows = product_values(self.filter_queryset(self.get_queryset()), fields)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serialize_product_rows(page, fields))
+        return Response(serialize_product_rows(rows, fields))
+
+class ProductSearchView(ProductListView):
+    """
+    GET /api/products/search?q=кольцо&min_price=&max_price=&in_stock=true&size=16.5
+    Ответ всегда постраничный: {count, next, previous, results}.
+    """
+
+    pagination_class = ProductSearchPagination
+
+    def _int_param(self, name: str) -> int | None:
+        raw = self.request.query_params.get(name)
+        if raw in (None, ""):
+            return None
+        try:
+            return int(raw)
+        except ValueError:
+            raise ValidationError({name: "Enter a whole number."})
+
+    def get_queryset(self):
+        params = self.request.query_params
+        queryset = search_products(Product.objects.all(), params.get("q", ""))
+
+        min_price = self._int_param("min_price")
+        if min_price is not None:
+            queryset = queryset.filter(price_uzs__gte=min_price)
+        max_price = self._int_param("max_price")
+        if max_price is not None:
+            queryset = queryset.filter(price_uzs__lte=max_price)
+
+        in_stock = params.get("in_stock")
+        if in_stock is not None:
+            queryset = queryset.filter(in_stock=in_stock.lower() in ("1", "true", "yes"))
+
+        size = params.get("size")
+        if size:
+            try:
+                tenths = size_to_tenths(parse_size(size))
+            except DjangoValidationError as e:
+                raise ValidationError({"size": e.messages})
+            queryset = queryset.filter(size_options__tenths=tenths)
+
+        ordering = ["-created_at", "id"]
+        if "search_rank" in queryset.query.annotations:
+            ordering.insert(0, "-search_rank")
+        return queryset.order_by(*ordering)
+
+    def list(self, request, *args, **kwargs):
+        return self.list_rows()
 
 class ProductDetailView(generics.RetrieveAPIView):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     lookup_field = 'slug'
 
+    def retrieve(self, request, *args, **kwargs):
+        row = get_object_or_404(product_values(self.get_queryset()), slug=kwargs["slug"])
+        return Response(serialize_product_rows([row])[0])
+
+MAX_BATCH_SLUGS = 100
+
+def batch_slugs(request, data=None):
+    """Слаги из ?slugs=a,b,c или тела POST {"slugs": [...]} без повторов; ValueError — ответ 400."""
+    if request.method == "POST":
+        slugs = data.get("slugs") if isinstance(data, dict) else None
+        if not isinstance(slugs, list) or not all(isinstance(slug, str) for slug in slugs):
+            raise ValueError("slugs must be a list of strings.")
+    else:
+        slugs = request.GET.get("slugs", "").split(",")
+    slugs = list(dict.fromkeys(slug.strip() for slug in slugs if slug.strip()))
+    if not slugs:
+        raise ValueError("slugs is required.")
+    if len(slugs) > MAX_BATCH_SLUGS:
+        raise ValueError(f"At most {MAX_BATCH_SLUGS} slugs per request.")
+    return slugs
+
+def products_by_slug(slugs, rows):
+    """{slug: товар или null} в порядке запроса и список ненайденных."""
+    found = {product["slug"]: product for product in serialize_product_rows(rows)}
+    return {
+        "products": {slug: found.get(slug) for slug in slugs},
+        "not_found": [slug for slug in slugs if slug not in found],
+    }
+
+class ProductBatchView(APIView):
+    """
+    GET /api/products/batch?slugs=a,b,c или POST {"slugs": [...]} — несколько
+    товаров одним запросом slug IN (...), тем же быстрым путём, что и каталог.
+    """
+
+    def get(self, request, *args, **kwargs):
+        try:
+            slugs = batch_slugs(request, request.data)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+        rows = product_values(Product.objects.filter(slug__in=slugs).order_by())
+        return Response(products_by_slug(slugs, rows))
+
+    post = get
+
+def replayed_response(record):
+    """Сохранённый ответ на заказ с тем же Idempotency-Key."""
+    response = HttpResponse(
+        render_json(record.response_body),
+        status=record.response_status,
+        content_type="application/json",
+    )
+    response["Idempotent-Replayed"] = "true"
+    return response
+
 class OrderCreateView(generics.CreateAPIView):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
+
+    def create(self, request, *args, **kwargs):
+        try:
+            key = idempotency.get_key(request.headers)
+            if key is None:
+                return super().create(request, *args, **kwargs)
+
+            request_fingerprint = idempotency.fingerprint(request.data)
+            record = idempotency.find(key, request_fingerprint)
+            if record is None:
+                serializer = self.get_serializer(data=request.data)
+                serializer.is_valid(raise_exception=True)
+                try:
+                    serializer.save(idempotency=(key, request_fingerprint))
+                except IntegrityError as e:
+                    record = idempotency.find_after_conflict(key, request_fingerprint, e)
+                else:
+                    return Response(serializer.data, status=201)
+        except idempotency.IdempotencyError as e:
+            return Response({"detail": str(e)}, status=e.status)
+        return replayed_response(record)
+
+class OrderBatchView(APIView):
+    """POST /api/orders/batch — несколько заказов из очереди фронтенда, результат по каждому."""
+
+    def post(self, request, *args, **kwargs):
+        try:
+            entries = order_batch.parse_batch(request.data)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+        return Response({"results": order_batch.create_orders(entries)})
+
+class CartQuoteView(APIView):
+    """POST /api/cart/quote — цены, сумма и ошибки по строкам корзины без создания заказа."""
+
+    def post(self, request, *args, **kwargs):
+        try:
+            items = cart_quote.parse_items(request.data)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+        return Response(cart_quote.quote(items))
@@ -1,6 +1,6 @@
 import { motion } from "framer-motion";
 import { Link } from "react-router-dom";
-import { Product } from "../utils/api";
+import { Product, fallbackToOriginal, productImage } from "../utils/api";
 
 interface ProductCardProps {
   product: Product;
@@ -17,8 +17,10 @@ export default function ProductCard({ product, onCompare, isComparing = false }:
       <Link to={`/product/${product.slug}`} className="block">
         <div className="aspect-[4/3] w-full overflow-hidden bg-slate-100">
           <img
-            src={product.image_urls[0]}
+            src={productImage(product)}
             alt={product.title}
+            loading="lazy"
+            onError={fallbackToOriginal(product)}
             className="h-full w-full object-cover transition duration-500 group-hover:scale-105"
           />
         </div>
@@ -1,7 +1,7 @@
 import { useState } from "react";
 import { motion } from "framer-motion";
 import { useI18n } from "../utils/useI18n";
-import { Product } from "../utils/api";
+import { Product, fallbackToOriginal, productImage } from "../utils/api";
 
 interface ProductComparisonProps {
   products: Product[];
@@ -121,8 +121,9 @@ export default function ProductComparison({ products, onClose }: ProductComparis
               <div key={product.id} className="p-4 border-l border-slate-200 dark:border-slate-800">
                 <div className="mb-4">
                   <img
-                    src={product.image_urls?.[0] || "/placeholder.jpg"}
+                    src={productImage(product)}
                     alt={product.title}
+                    onError={fallbackToOriginal(product)}
                     className="w-full h-32 object-cover rounded-lg"
                   />
                   <h3 className="font-medium text-sm text-slate-900 dark:text-white mt-2">
@@ -1,7 +1,7 @@
 import { useState } from "react";
 import { motion, AnimatePresence } from "framer-motion";
 import { useI18n } from "../utils/useI18n";
-import { Product } from "../utils/api";
+import { Product, fallbackToOriginal, productImage } from "../utils/api";
 import { useCartStore } from "../store/cartStore";
 
 interface WishlistProps {
@@ -65,8 +65,9 @@ export default function Wishlist({ isOpen, onClose, wishlist, onRemoveFromWishli
                   <div className="flex gap-4">
                     {/* Product Image */}
                     <img
-                      src={product.image_urls?.[0] || "/placeholder.jpg"}
+                      src={productImage(product)}
                       alt={product.title}
+                      onError={fallbackToOriginal(product)}
                       className="w-20 h-20 object-cover rounded-lg"
                     />
 
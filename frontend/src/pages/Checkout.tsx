@@ -3,7 +3,7 @@ import { motion } from "framer-motion";
 import { useCartStore } from "../store/cartStore";
 import { useToastStore } from "../store/toastStore";
 import { useUiStore } from "../store/uiStore";
-import { submitOrder, OrderPayload } from "../utils/api";
+import { quoteCart, submitOrder, OrderPayload } from "../utils/api";
 import { useI18n } from "../utils/useI18n";
 
 type Status = "idle" | "sent" | "queued" | "failed";
@@ -65,6 +65,14 @@ export default function Checkout() {
       meta: { locale, theme },
     };
 
+    // Размеры, остатки и наличие проверяются до отправки — без записи заказа
+    const quote = await quoteCart(payload.items);
+    const failedLine = quote?.lines.find((line) => line.error);
+    if (failedLine) {
+      toast.push(failedLine.error || t.toast.orderError, "error");
+      return;
+    }
+
     try {
       const result = await submitOrder(payload);
 
@@ -7,6 +7,7 @@ const API =
 const QUEUE_KEY = "orders_queue_v1";
 const CACHE_KEY = "products_cache_v1";
 const CACHE_TS_KEY = "products_cache_ts_v1";
+const CACHE_CURSOR_KEY = "products_cache_cursor_v1";
 const BACKEND_5XX_COOLDOWN_KEY = "orders_backend_5xx_cooldown_v1";
 const BACKEND_5XX_COOLDOWN_MS = 5 * 60 * 1000;
 
@@ -17,6 +18,8 @@ export interface Product {
   description: string;
   price_uzs: number;
   image_urls: string[];
+  /** Relative URL of a resized WebP preview (null when the backend has no Pillow) */
+  thumbnail_url?: string | null;
   category?: string;
   available_sizes?: number[];
   sizes?: number[];
@@ -108,10 +111,13 @@ export function getCacheTimestamp(): number | null {
   }
 }
 
-function saveCache(data: Product[]): void {
+function saveCache(data: Product[], cursor: string | null = null): void {
   try {
+    // Курсор без каталога не нужен: сначала убираем, потом пишем оба
+    localStorage.removeItem(CACHE_CURSOR_KEY);
     localStorage.setItem(CACHE_KEY, JSON.stringify(data));
     localStorage.setItem(CACHE_TS_KEY, String(Date.now()));
+    if (cursor) localStorage.setItem(CACHE_CURSOR_KEY, cursor);
   } catch {
     // ignore
   }
@@ -129,13 +135,29 @@ type PostOrderResult =
   | { ok: true; data: unknown }
   | { ok: false; status: number; errorMessage?: string };
 
-async function postOrder(order: OrderPayload): Promise<PostOrderResult> {
+/**
+ * orderId уходит как Idempotency-Key: повтор того же заказа (ретрай, очередь)
+ * бэкенд не создаёт заново, а возвращает первый ответ.
+ */
+async function postOrder(
+  order: OrderPayload,
+  orderId: string
+): Promise<PostOrderResult> {
   const url = `${API.replace(/\/$/, "")}/api/orders/`;
-  const res = await fetch(url, {
-    method: "POST",
-    headers: { "Content-Type": "application/json" },
-    body: JSON.stringify(toBackendFormat(order)),
-  });
+  let res: Response;
+  try {
+    res = await fetch(url, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        "Idempotency-Key": orderId,
+      },
+      body: JSON.stringify(toBackendFormat(order)),
+    });
+  } catch {
+    // сеть недоступна — заказ уйдёт позже из очереди с тем же ключом
+    return { ok: false, status: 0 };
+  }
 
   if (res.status === 409) {
     return { ok: true, data: { status: "already_exists" } };
@@ -171,10 +193,52 @@ async function postOrder(order: OrderPayload): Promise<PostOrderResult> {
   return { ok: true, data: await res.json() };
 }
 
+export interface CartQuoteLine {
+  productSlug: string | null;
+  qty: number | null;
+  selectedSize: string | number | null;
+  error: string | null;
+  title?: string;
+  price_uzs?: number;
+  line_total_uzs?: number;
+}
+
+export interface CartQuote {
+  ok: boolean;
+  subtotal_uzs: number;
+  lines: CartQuoteLine[];
+}
+
+/**
+ * Проверка корзины без создания заказа: цены, сумма и ошибка по каждой строке.
+ * null — бэкенд недоступен; тогда заказ отправляется как обычно (или в очередь).
+ */
+export async function quoteCart(items: OrderPayload["items"]): Promise<CartQuote | null> {
+  const url = `${API.replace(/\/$/, "")}/api/cart/quote`;
+  try {
+    const res = await fetch(url, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({
+        items: items.map((it) => ({
+          productSlug: it.product_slug,
+          qty: it.qty,
+          selectedSize: it.size,
+        })),
+      }),
+    });
+    if (!res.ok) return null;
+    return (await res.json()) as CartQuote;
+  } catch {
+    return null;
+  }
+}
+
 export async function submitOrder(
   order: OrderPayload
 ): Promise<{ ok: boolean; queued: boolean; errorMessage?: string }> {
-  const result = await postOrder(order);
+  const orderId = generateOrderId();
+  const result = await postOrder(order, orderId);
 
   if (result.ok) return { ok: true, queued: false };
   if (result.status >= 500) return { ok: false, queued: false };
@@ -183,12 +247,73 @@ export async function submitOrder(
 
   // fallback queue
   const queue = loadQueue();
-  const orderId = generateOrderId();
   queue.push({ orderId, order, createdAt: Date.now() });
   saveQueue(queue);
   return { ok: false, queued: true, errorMessage: result.errorMessage };
 }
 
+const ORDER_BATCH_LIMIT = 50; // MAX_BATCH_ORDERS на бэкенде
+
+type BatchOrderResult = { idempotency_key: string | null; status: number };
+
+/**
+ * Очередь одним запросом POST /api/orders/batch. null — эндпоинта нет
+ * (старый бэкенд), тогда заказы отправляются по одному.
+ */
+async function postOrderBatch(
+  items: QueuedOrder[]
+): Promise<BatchOrderResult[] | null | "retry"> {
+  const url = `${API.replace(/\/$/, "")}/api/orders/batch`;
+  let res: Response;
+  try {
+    res = await fetch(url, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({
+        orders: items.map((item) => ({
+          idempotency_key: item.orderId,
+          order: toBackendFormat(item.order),
+        })),
+      }),
+    });
+  } catch {
+    return "retry";
+  }
+
+  if (res.status === 404 || res.status === 405) return null;
+  if (res.status >= 500) {
+    try {
+      localStorage.setItem(BACKEND_5XX_COOLDOWN_KEY, String(Date.now()));
+    } catch {
+      // ignore
+    }
+    return "retry";
+  }
+  if (!res.ok) return "retry";
+
+  try {
+    const data = await res.json();
+    return Array.isArray(data?.results) ? data.results : "retry";
+  } catch {
+    return "retry";
+  }
+}
+
+async function flushOneByOne(queue: QueuedOrder[]): Promise<void> {
+  for (const item of queue) {
+    const rest = queue.filter((q) => q.orderId !== item.orderId);
+    saveQueue(rest);
+    queue = rest;
+
+    const result = await postOrder(item.order, item.orderId);
+
+    if (!result.ok && result.status < 500) {
+      queue = [...queue, item];
+      saveQueue(queue);
+    }
+  }
+}
+
 let flushInProgress = false;
 
 export async function flushOrderQueue(): Promise<void> {
@@ -207,32 +332,77 @@ export async function flushOrderQueue(): Promise<void> {
 
   flushInProgress = true;
   try {
-    let queue = loadQueue();
+    const queue = loadQueue();
     if (!queue.length) return;
-
-    for (const item of queue) {
-      const rest = queue.filter((q) => q.orderId !== item.orderId);
-      saveQueue(rest);
-      queue = rest;
-
-      const result = await postOrder(item.order);
-
-      if (!result.ok && result.status < 500) {
-        queue = [...queue, item];
-        saveQueue(queue);
+    for (let start = 0; start < queue.length; start += ORDER_BATCH_LIMIT) {
+      const batch = queue.slice(start, start + ORDER_BATCH_LIMIT);
+      const results = await postOrderBatch(batch);
+      if (results === "retry") return;
+      if (results === null) {
+        await flushOneByOne(loadQueue());
+        return;
       }
+
+      // Принятые заказы (и повторы уже принятых) уходят из очереди, остальные
+      // остаются — как при отправке по одному; ключ у повтора тот же
+      const sent = new Set(
+        results
+          .filter((r) => r.status >= 200 && r.status < 300)
+          .map((r) => r.idempotency_key)
+      );
+      saveQueue(loadQueue().filter((q) => !sent.has(q.orderId)));
     }
   } finally {
     flushInProgress = false;
   }
 }
 
-async function getProducts(): Promise<Product[]> {
-  const url = `${API.replace(/\/$/, "")}/api/products/`;
-  const res = await fetch(url, { cache: "no-store" });
+interface CatalogFeed {
+  cursor: string;
+  reset: boolean;
+  changed: Product[];
+  deleted: string[];
+}
+
+/** Накладывает ленту изменений на сохранённый каталог; порядок как у бэкенда — новые первыми */
+function applyFeed(cached: Product[], feed: CatalogFeed): Product[] {
+  const byId = new Map<string, Product>(
+    feed.reset ? [] : cached.map((p) => [String(p.id), p])
+  );
+  for (const id of feed.deleted) byId.delete(id);
+  for (const p of feed.changed) byId.set(String(p.id), p);
+  return [...byId.values()].sort(
+    (a, b) => Date.parse(b.created_at) - Date.parse(a.created_at)
+  );
+}
+
+/**
+ * Каталог через ?since=<cursor>: при повторном визите приходят только
+ * изменённые и удалённые товары. Без сохранённой копии — since=0 (весь каталог).
+ */
+async function getProducts(): Promise<{ products: Product[]; cursor: string | null }> {
+  const cached = loadCache();
+  let since = "0";
+  try {
+    since = (cached.length && localStorage.getItem(CACHE_CURSOR_KEY)) || "0";
+  } catch {
+    // ignore
+  }
+
+  const url = `${API.replace(/\/$/, "")}/api/products/?since=${encodeURIComponent(since)}`;
+  // no-cache: since=0 браузер перепроверяет по ETag и получает 304 без тела
+  const res = await fetch(url, { cache: "no-cache" });
   if (!res.ok) throw new Error(`HTTP ${res.status}`);
   const data = await res.json();
-  return Array.isArray(data) ? data : [];
+  // Бэкенд без ленты изменений отдаёт весь каталог массивом
+  if (Array.isArray(data)) return { products: data, cursor: null };
+  if (!Array.isArray(data?.changed) || !Array.isArray(data?.deleted)) {
+    throw new Error("Unexpected catalog feed response");
+  }
+  return {
+    products: applyFeed(since === "0" ? [] : cached, data as CatalogFeed),
+    cursor: data.cursor ?? null,
+  };
 }
 
 export async function fetchProductsWithRetry(): Promise<{
@@ -243,9 +413,9 @@ export async function fetchProductsWithRetry(): Promise<{
 
   for (let attempt = 1; attempt <= 3; attempt++) {
     try {
-      const data = await getProducts();
-      saveCache(data);
-      return { data, error: null };
+      const { products, cursor } = await getProducts();
+      saveCache(products, cursor);
+      return { data: products, error: null };
     } catch {
       if (attempt < 3) {
         await new Promise((r) => setTimeout(r, 800 * attempt));
@@ -285,9 +455,41 @@ export async function fetchProductWithCache(
   }
 }
 
+const PRODUCT_BATCH_LIMIT = 100; // MAX_BATCH_SLUGS на бэкенде
+
+/**
+ * Несколько товаров одним запросом: { slug: товар или null, если не найден }.
+ * Без сети — из сохранённого каталога.
+ */
+export async function fetchProductsBySlugs(
+  slugs: string[]
+): Promise<Record<string, Product | null>> {
+  const unique = [...new Set(slugs)];
+  const result: Record<string, Product | null> = {};
+  try {
+    for (let start = 0; start < unique.length; start += PRODUCT_BATCH_LIMIT) {
+      const chunk = unique.slice(start, start + PRODUCT_BATCH_LIMIT);
+      const url = `${API.replace(/\/$/, "")}/api/products/batch?slugs=${chunk
+        .map(encodeURIComponent)
+        .join(",")}`;
+      const response = await fetch(url, { cache: "no-store" });
+      if (!response.ok)
+        throw new Error(`Failed to fetch products: ${response.statusText}`);
+      const data = await response.json();
+      Object.assign(result, data.products);
+    }
+  } catch {
+    const cached = loadCache();
+    for (const slug of unique) {
+      if (!(slug in result)) result[slug] = cached.find((p) => p.slug === slug) ?? null;
+    }
+  }
+  return result;
+}
+
 export async function fetchProducts(): Promise<Product[]> {
   const url = `${API.replace(/\/$/, "")}/api/products/`;
-  const response = await fetch(url, { cache: "no-store" });
+  const response = await fetch(url, { cache: "no-cache" });
   if (!response.ok)
     throw new Error(`Failed to fetch products: ${response.statusText}`);
   return response.json();
@@ -296,3 +498,19 @@ export async function fetchProducts(): Promise<Product[]> {
 export function getApiBase(): string {
   return API;
 }
+
+/** Preview for product cards: backend thumbnail if available, otherwise the original photo */
+export function productImage(product: Product): string {
+  if (product.thumbnail_url) {
+    return `${API.replace(/\/$/, "")}${product.thumbnail_url}`;
+  }
+  return product.image_urls?.[0] || "/placeholder.jpg";
+}
+
+/** onError for <img src={productImage(product)}>: thumbnail unavailable — show the original photo */
+export function fallbackToOriginal(product: Product) {
+  return (e: { currentTarget: HTMLImageElement }) => {
+    const original = product.image_urls?.[0];
+    if (original && e.currentTarget.src !== original) e.currentTarget.src = original;
+  };
+}